@@ -0,0 +1,203 @@
+import asyncio
+import collections
+import math
+
+
+# === Admission control ===
+# Caps how many requests a worker works on at once. Beyond the cap, requests
+# wait in a bounded queue for at most `queue_timeout` seconds; when the queue
+# is full or the wait runs out they get an immediate 503 with Retry-After
+# instead of adding to everyone's latency. Priority requests (conversations
+# already in progress) are served from the queue first and, when it is full,
+# take the place of the newest ordinary waiter.
+#
+# Async handlers that never yield (/chat) hold a slot for a single step of
+# the loop, so the cap alone never engages for them: their backlog builds up
+# as tasks waiting for the event loop, before any middleware runs. For that
+# the middleware also watches event-loop lag, which is how long a request
+# that arrives now waits before it is looked at, and turns requests away
+# while it exceeds `queue_timeout`.
+#
+# Everything runs on the worker's event loop, so there are no locks.
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, max_queue: int = 0, queue_timeout: float = 1.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._priority = collections.deque()  # futures of waiting requests
+        self._normal = collections.deque()
+        # Totals, for metrics.
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.shed = 0
+        self.late = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._priority) + len(self._normal)
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free and nobody is queued ahead."""
+        if self.active < self.max_concurrent and not self.waiting:
+            self.active += 1
+            self.admitted += 1
+            return True
+        return False
+
+    async def acquire(self, priority: bool = False) -> bool:
+        """Wait for a slot; False means the request should be turned away."""
+        if self.try_acquire():
+            return True
+        if self.waiting >= self.max_queue:
+            if not (priority and self._normal):
+                self.rejected += 1
+                return False
+            # Make room by turning away the newest ordinary waiter.
+            self._normal.pop().set_result(False)
+            self.shed += 1
+
+        queue = self._priority if priority else self._normal
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait((future,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if future.done() and future.result():
+                self.release()  # handed a slot it can no longer use
+            raise
+        finally:
+            if not future.done():
+                # Timed out, or the client went away while waiting.
+                queue.remove(future)
+                future.cancel()
+        if future.cancelled():
+            self.timed_out += 1
+            return False
+        return future.result()
+
+    def release(self):
+        """Free a slot, handing it straight to the next waiter if any."""
+        for queue in (self._priority, self._normal):
+            while queue:
+                future = queue.popleft()
+                if not future.done():
+                    future.set_result(True)
+                    self.admitted += 1
+                    return
+        self.active -= 1
+
+
+class LoopLag:
+    """How far behind schedule the running event loop is.
+
+    A task sleeps for `interval` and notes how late it woke up: anything that
+    became ready at the same time waited that long too. A wake-up that is
+    overdue right now counts as well, so a stall shows while it lasts. The
+    sampler starts on the first call, on the caller's loop.
+    """
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.lag = 0.0
+        self._due = 0.0
+        self._task = None
+
+    def current(self) -> float:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self.lag = 0.0
+            self._due = loop.time() + self.interval
+            self._task = loop.create_task(self._sample())
+        return max(self.lag, loop.time() - self._due)
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - self._due)
+
+
+async def _read_body(receive):
+    """Read the whole request body; returns it and a receive() that replays it."""
+    chunks, more = [], True
+    while more:
+        message = await receive()
+        if message["type"] != "http.request":
+            return b"", receive  # disconnected; let the app see it
+        chunks.append(message.get("body", b""))
+        more = message.get("more_body", False)
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay
+
+
+class AdmissionMiddleware:
+    """Puts an AdmissionController in front of some paths (pure ASGI).
+
+    `await is_priority(body)` classifies a request from its body. It is only
+    consulted when the request has to queue, and only for bodies up to
+    `peek_limit` bytes.
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths, is_priority=None,
+                 retry_after: float = 1.0, peek_limit: int = 4096):
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+        self.is_priority = is_priority
+        self.peek_limit = peek_limit
+        self.loop_lag = LoopLag()
+        self._rejection = [
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            (b"cache-control", b"no-store"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        controller = self.controller
+        if self.loop_lag.current() > controller.queue_timeout:
+            # It has already waited longer than the queue would let it.
+            controller.late += 1
+            return await self._reject(send)
+        if not controller.try_acquire():
+            priority = False
+            if self.is_priority is not None and self._small_body(scope):
+                body, receive = await _read_body(receive)
+                priority = await self.is_priority(body)
+            if not await controller.acquire(priority):
+                return await self._reject(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+    def _small_body(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                return value.isdigit() and int(value) <= self.peek_limit
+        return False
+
+    async def _reject(self, send):
+        body = b'{"detail":"Server is busy, please retry shortly."}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": self._rejection + [(b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
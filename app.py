@@ -1,407 +1,773 @@
-import difflib
-import spacy
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-
-# === Load lightweight NLP ===
-nlp = spacy.blank("en")
-if "sentencizer" not in nlp.pipe_names:
-    nlp.add_pipe("sentencizer")
-
-# === Knowledge Base (your existing one) ===
-KNOWLEDGE_BASE = {
-    "common_cold": {
-        "title": "Common Cold",
-        "info": "The common cold is a mild viral infection of the upper respiratory tract, mainly caused by rhinoviruses, adenoviruses, and coronaviruses. It spreads through airborne droplets or by touching contaminated surfaces. While generally harmless, it can cause discomfort and may lead to complications in people with weakened immunity.",
-        "prevention": "Wash hands often, avoid touching your face, disinfect frequently touched objects, use tissues or your elbow when sneezing/coughing, and avoid close contact with sick individuals.",
-        "care": "No cure exists. Care includes rest, drinking plenty of fluids, and using over-the-counter pain relievers, decongestants, or saline sprays. Symptoms usually improve in 7–10 days."
-    },
-    "influenza": {
-        "title": "Influenza (Flu)",
-        "info": "Influenza is a contagious respiratory illness caused by influenza viruses. It spreads rapidly through droplets when an infected person coughs, sneezes, or talks. It can range from mild to severe and may cause complications like pneumonia, especially in young children, the elderly, or people with chronic diseases.",
-        "prevention": "Get annual flu vaccinations, wash hands often, avoid close contact with infected individuals, and maintain a healthy immune system.",
-        "care": "Antiviral medications (e.g., oseltamivir) may be prescribed if started early. Supportive care includes rest, hydration, and fever reducers. Hospitalization may be required for severe cases."
-    },
-    "covid19": {
-        "title": "COVID-19",
-        "info": "COVID-19 is caused by the SARS-CoV-2 virus. It primarily spreads through respiratory droplets and close contact. Symptoms range from mild (fever, cough, fatigue) to severe (shortness of breath, pneumonia, organ failure). Some patients experience long-term effects, known as 'long COVID.'",
-        "prevention": "Vaccination, mask-wearing in crowded spaces, hand hygiene, ventilation, and avoiding close contact with infected individuals.",
-        "care": "Mild cases require rest, fluids, and fever management. Severe cases may need oxygen therapy, antivirals, corticosteroids, or intensive care. Long-term rehabilitation may be necessary for post-COVID symptoms."
-    },
-    "tuberculosis": {
-        "title": "Tuberculosis (TB)",
-        "info": "Tuberculosis is a bacterial infection caused by Mycobacterium tuberculosis, primarily affecting the lungs but can also impact other organs. It spreads through airborne droplets from coughing or sneezing. If untreated, TB can be life-threatening.",
-        "prevention": "BCG vaccination, early detection and treatment of active TB cases, proper ventilation in living spaces, and wearing masks in high-risk areas.",
-        "care": "Treatment requires a long course (6–9 months) of multiple antibiotics (e.g., isoniazid, rifampin). Directly Observed Therapy (DOT) is recommended to ensure compliance. Supportive care includes nutrition and rest."
-    },
-    "malaria": {
-        "title": "Malaria",
-        "info": "Malaria is a life-threatening disease caused by Plasmodium parasites, transmitted through bites of infected female Anopheles mosquitoes. Symptoms include fever, chills, and sweating, which may recur in cycles. Severe malaria can cause anemia, organ failure, and death.",
-        "prevention": "Use insecticide-treated mosquito nets, insect repellents, protective clothing, and antimalarial prophylaxis when traveling to endemic regions.",
-        "care": "Antimalarial drugs such as artemisinin-based combination therapy (ACT) are standard. Severe cases may need intravenous medications and supportive care in hospitals."
-    },
-    "dengue": {
-        "title": "Dengue Fever",
-        "info": "Dengue is a viral infection transmitted by Aedes mosquitoes. Symptoms include high fever, severe headache, muscle/joint pain, skin rash, and bleeding tendencies. Severe dengue (dengue hemorrhagic fever) can be fatal.",
-        "prevention": "Eliminate mosquito breeding sites, use repellents and protective clothing, and install mosquito nets/screens. Community awareness is crucial.",
-        "care": "There is no specific antiviral treatment. Care focuses on hydration, rest, and fever management with acetaminophen (not aspirin/NSAIDs, as they increase bleeding risk). Hospitalization may be required for severe cases."
-    },
-    "typhoid": {
-        "title": "Typhoid Fever",
-        "info": "Typhoid is a bacterial infection caused by Salmonella Typhi, usually spread through contaminated food or water. Symptoms include prolonged fever, abdominal pain, weakness, headache, and sometimes rash.",
-        "prevention": "Drink safe water, maintain proper sanitation, practice hand hygiene, and consider vaccination if traveling to high-risk areas.",
-        "care": "Treatment involves antibiotics (e.g., ciprofloxacin, ceftriaxone). Supportive care includes hydration, a nutritious diet, and rest. Severe cases may require hospitalization."
-    },
-    "cholera": {
-        "title": "Cholera",
-        "info": "Cholera is a severe diarrheal disease caused by Vibrio cholerae, usually spread through contaminated water or food. It can lead to rapid dehydration and shock if untreated.",
-        "prevention": "Ensure access to clean drinking water, proper sanitation, handwashing, and food safety practices. Oral cholera vaccines are available in high-risk areas.",
-        "care": "Immediate rehydration with Oral Rehydration Solution (ORS) is critical. Severe cases may need intravenous fluids and antibiotics (e.g., doxycycline)."
-    },
-    "asthma": {
-        "title": "Asthma",
-        "info": "Asthma is a chronic inflammatory disease of the airways that causes recurrent episodes of wheezing, breathlessness, chest tightness, and coughing. Triggers include allergens, pollution, exercise, and respiratory infections.",
-        "prevention": "Avoid triggers (dust, smoke, allergens), maintain a healthy lifestyle, and get vaccinated against respiratory infections.",
-        "care": "Asthma is managed with inhaled corticosteroids (to reduce inflammation) and bronchodilators (to open airways). Emergency inhalers are used during attacks. Long-term monitoring and adherence to treatment plans are essential."
-    },
-    "diabetes_type1": {
-        "title": "Diabetes Type 1",
-        "info": "Type 1 diabetes is an autoimmune condition where the immune system destroys insulin-producing beta cells in the pancreas. It usually develops in childhood or adolescence. Without insulin, blood sugar levels rise dangerously, leading to complications.",
-        "prevention": "Currently, there is no known prevention for type 1 diabetes. Research is ongoing into genetic and environmental risk factors.",
-        "care": "Lifelong insulin therapy is required. Patients must monitor blood sugar regularly, follow a healthy diet, exercise, and manage stress. Education about recognizing and managing hypoglycemia is critical."
-    },
-    "diabetes_type2": {
-        "title": "Diabetes Type 2",
-        "info": "Type 2 diabetes is a chronic condition where the body becomes resistant to insulin or does not produce enough of it. It is strongly linked to obesity, poor diet, physical inactivity, genetics, and aging. If uncontrolled, it can cause complications like heart disease, kidney failure, blindness, and nerve damage.",
-        "prevention": "Maintain a healthy body weight, eat a balanced diet low in sugar and refined carbs, exercise regularly (at least 150 minutes per week), avoid smoking, and attend regular health check-ups.",
-        "care": "Management includes lifestyle changes, oral medications like metformin, and in some cases insulin. Regular monitoring of blood glucose, cholesterol, and blood pressure is important. Patients may need routine eye, kidney, and foot check-ups to prevent complications."
-    },
-    "hypertension": {
-        "title": "Hypertension (High Blood Pressure)",
-        "info": "Hypertension is a chronic condition where blood pressure in the arteries is consistently elevated. Often called the 'silent killer,' it may not show symptoms but significantly increases the risk of stroke, heart disease, and kidney failure.",
-        "prevention": "Adopt a low-salt, balanced diet, exercise regularly, maintain a healthy weight, avoid excessive alcohol and smoking, and manage stress.",
-        "care": "Treatment may involve lifestyle modifications and antihypertensive medications (e.g., ACE inhibitors, beta-blockers, diuretics). Regular monitoring and long-term adherence to treatment are essential."
-    },
-    "stroke": {
-        "title": "Stroke",
-        "info": "A stroke occurs when blood flow to part of the brain is interrupted (ischemic stroke) or when a blood vessel bursts (hemorrhagic stroke). It causes brain cells to die within minutes. Symptoms include sudden weakness, confusion, trouble speaking, or loss of vision.",
-        "prevention": "Control risk factors like hypertension, diabetes, and high cholesterol. Avoid smoking, exercise regularly, maintain a healthy weight, and eat a balanced diet.",
-        "care": "Immediate medical attention is critical. Treatment may involve clot-busting drugs for ischemic stroke or surgery for hemorrhagic stroke. Long-term care includes physiotherapy, speech therapy, and lifestyle changes to prevent recurrence."
-    },
-    "heart_attack": {
-        "title": "Heart Attack (Myocardial Infarction)",
-        "info": "A heart attack occurs when blood flow to part of the heart muscle is blocked, usually by a blood clot in the coronary arteries. Symptoms include chest pain, shortness of breath, nausea, and sweating. It can be fatal without urgent treatment.",
-        "prevention": "Manage risk factors like high cholesterol, hypertension, and diabetes. Adopt a heart-healthy diet, exercise, avoid smoking, and maintain a healthy weight.",
-        "care": "Emergency care may include aspirin, clot-dissolving drugs, angioplasty, or bypass surgery. Long-term management includes lifestyle changes, medications (statins, beta-blockers), and cardiac rehabilitation."
-    },
-    "hepatitis_b": {
-        "title": "Hepatitis B",
-        "info": "Hepatitis B is a viral infection that attacks the liver and can cause both acute and chronic disease. It spreads through contact with infected blood, sexual transmission, or from mother to child during childbirth. Chronic infection can lead to liver cirrhosis or cancer.",
-        "prevention": "Vaccination is the best prevention. Avoid sharing needles, practice safe sex, and ensure safe blood transfusions.",
-        "care": "Acute cases usually resolve on their own with supportive care. Chronic cases may require antiviral medications (e.g., tenofovir, entecavir) and regular monitoring of liver function."
-    },
-    "hepatitis_c": {
-        "title": "Hepatitis C",
-        "info": "Hepatitis C is a viral liver infection spread mainly through contact with contaminated blood (e.g., unsafe injections, transfusions). Unlike hepatitis B, there is no vaccine. Chronic infection can lead to cirrhosis, liver failure, or liver cancer.",
-        "prevention": "Avoid sharing needles, ensure safe blood transfusions, and use sterile medical equipment. Practice safe sex in high-risk situations.",
-        "care": "Treatment includes direct-acting antiviral medications, which can cure most cases. Supportive care involves regular monitoring and avoiding alcohol or drugs that damage the liver."
-    },
-    "hiv_aids": {
-        "title": "HIV/AIDS",
-        "info": "Human Immunodeficiency Virus (HIV) attacks the immune system, weakening the body’s defense against infections. If untreated, it progresses to Acquired Immunodeficiency Syndrome (AIDS). HIV spreads through blood, sexual contact, or from mother to child.",
-        "prevention": "Practice safe sex, avoid sharing needles, ensure safe blood products, and take preventive medicines like PrEP if at high risk.",
-        "care": "There is no cure, but antiretroviral therapy (ART) allows people with HIV to live long, healthy lives. Treatment also includes monitoring for opportunistic infections and regular medical care."
-    },
-    "pneumonia": {
-        "title": "Pneumonia",
-        "info": "Pneumonia is an infection that inflames the air sacs in the lungs, which may fill with fluid or pus. It can be caused by bacteria, viruses, or fungi. Symptoms include cough, fever, chest pain, and difficulty breathing.",
-        "prevention": "Vaccinations (pneumococcal, flu), good hygiene, and avoiding smoking help prevent pneumonia.",
-        "care": "Bacterial pneumonia requires antibiotics. Viral pneumonia is treated with supportive care (rest, fluids, fever reducers). Severe cases may need hospitalization and oxygen therapy."
-    },
-    "measles": {
-        "title": "Measles",
-        "info": "Measles is a highly contagious viral infection spread through coughing and sneezing. Symptoms include high fever, cough, runny nose, conjunctivitis, and a characteristic rash. Complications can include pneumonia, encephalitis, and death.",
-        "prevention": "Vaccination (MMR vaccine) is the best prevention. Isolate infected individuals to reduce spread.",
-        "care": "There is no specific antiviral treatment. Care includes rest, hydration, vitamin A supplements, and treating symptoms. Severe cases may need hospitalization."
-    },
-    "mumps": {
-        "title": "Mumps",
-        "info": "Mumps is a contagious viral infection that primarily affects the salivary glands, causing swelling in the cheeks and jaw. It spreads through respiratory droplets. Complications include meningitis, orchitis (testicular inflammation), and hearing loss.",
-        "prevention": "Vaccination (MMR vaccine) is highly effective. Good hygiene and avoiding contact with infected individuals help reduce spread.",
-        "care": "Treatment is supportive: rest, hydration, pain relievers, and applying warm or cold packs to swollen glands. Most cases resolve in a few weeks."
-    },
-    "rubella": {
-        "title": "Rubella (German Measles)",
-        "info": "Rubella is a contagious viral infection that causes mild fever, rash, and swollen lymph nodes. It is especially dangerous for pregnant women, as it can cause congenital rubella syndrome in babies.",
-        "prevention": "Vaccination (MMR vaccine) is the best protection. Pregnant women should avoid contact with infected individuals.",
-        "care": "No specific treatment. Supportive care includes rest, hydration, and fever management. Most cases recover quickly."
-    },
-    "tuberculosis": {
-        "title": "Tuberculosis (TB)",
-        "info": "TB is a bacterial infection caused by Mycobacterium tuberculosis, mainly affecting the lungs but can spread to other organs. Symptoms include cough lasting more than 2 weeks, weight loss, night sweats, and fever.",
-        "prevention": "BCG vaccination, good ventilation, mask usage in high-risk areas, and early detection and treatment of active cases.",
-        "care": "Treatment involves a long course (6–9 months) of antibiotics such as isoniazid, rifampicin, pyrazinamide, and ethambutol. Adherence to therapy is crucial to prevent drug resistance."
-    },
-    "cholera": {
-        "title": "Cholera",
-        "info": "Cholera is an acute diarrheal infection caused by Vibrio cholerae bacteria, usually from contaminated water or food. It can cause severe dehydration and death within hours if untreated.",
-        "prevention": "Ensure safe drinking water, proper sanitation, hand hygiene, and vaccination in high-risk areas.",
-        "care": "Immediate rehydration with oral rehydration solution (ORS) is critical. Severe cases may need intravenous fluids and antibiotics like doxycycline or azithromycin."
-    },
-    "diphtheria": {
-        "title": "Diphtheria",
-        "info": "Diphtheria is a serious bacterial infection affecting the mucous membranes of the throat and nose. It produces toxins that can damage the heart, nerves, and kidneys. Symptoms include sore throat, fever, and a thick gray membrane in the throat.",
-        "prevention": "DTaP/Tdap vaccination is the best protection. Isolate infected individuals to prevent spread.",
-        "care": "Treatment includes diphtheria antitoxin and antibiotics (erythromycin or penicillin). Supportive care may be needed for breathing difficulties."
-    },
-    "whooping_cough": {
-        "title": "Whooping Cough (Pertussis)",
-        "info": "Pertussis is a highly contagious bacterial infection that causes severe coughing fits followed by a 'whooping' sound. It can be dangerous for infants and young children.",
-        "prevention": "DTaP/Tdap vaccination, especially for children and pregnant women, is essential. Avoid close contact with infected individuals.",
-        "care": "Antibiotics such as azithromycin or clarithromycin are used. Supportive care includes rest, hydration, and in severe cases, hospitalization with oxygen therapy."
-    },
-    "influenza": {
-        "title": "Influenza (Flu)",
-        "info": "Influenza is a viral respiratory illness that spreads through droplets. Symptoms include fever, cough, sore throat, muscle aches, and fatigue. Complications can include pneumonia and worsening of chronic diseases.",
-        "prevention": "Annual flu vaccination, good hand hygiene, mask use, and avoiding close contact with sick individuals.",
-        "care": "Antiviral medications (oseltamivir, zanamivir) may shorten illness if started early. Supportive care includes rest, fluids, and fever-reducing medications."
-    },
-    "covid19": {
-        "title": "COVID-19",
-        "info": "COVID-19 is caused by the SARS-CoV-2 virus. It spreads mainly through respiratory droplets and can range from mild symptoms to severe pneumonia, multi-organ failure, and death.",
-        "prevention": "Vaccination, mask-wearing, good ventilation, hand hygiene, and social distancing in high-risk areas.",
-        "care": "Mild cases need rest, fluids, and fever management. Severe cases may require hospitalization, oxygen, antivirals, or steroids. Long-term monitoring may be necessary for post-COVID conditions."
-    },
-    "malaria": {
-        "title": "Malaria",
-        "info": "Malaria is a mosquito-borne disease caused by Plasmodium parasites. Symptoms include fever, chills, sweating, and anemia. Severe malaria can lead to coma or death.",
-        "prevention": "Use insecticide-treated mosquito nets, indoor spraying, prophylactic drugs in high-risk areas, and eliminating stagnant water.",
-        "care": "Treatment depends on the Plasmodium species and severity. Artemisinin-based combination therapies (ACTs) are the standard treatment. Severe cases require intravenous artesunate."
-    },
-    "dengue": {
-        "title": "Dengue Fever",
-        "info": "Dengue is a mosquito-borne viral infection causing high fever, severe headache, joint and muscle pain, rash, and in severe cases, dengue hemorrhagic fever or shock syndrome.",
-        "prevention": "Prevent mosquito bites by using nets, repellents, and removing breeding sites. Community mosquito control is important.",
-        "care": "No specific antiviral treatment. Supportive care includes hydration, fever control (avoid aspirin/NSAIDs), and monitoring for warning signs. Severe cases may require hospitalization."
-    },
-    "typhoid": {
-        "title": "Typhoid Fever",
-        "info": "Typhoid is a bacterial infection caused by Salmonella typhi, spread through contaminated food and water. Symptoms include prolonged fever, abdominal pain, weakness, and constipation or diarrhea.",
-        "prevention": "Safe drinking water, proper sanitation, good hygiene, and vaccination in high-risk areas.",
-        "care": "Antibiotics (azithromycin, ceftriaxone, or fluoroquinolones where effective) are the main treatment. Rehydration and proper nutrition support recovery."
-    },
-    "hepatitis_a": {
-        "title": "Hepatitis A",
-        "info": "Hepatitis A is a viral liver infection transmitted mainly through contaminated food and water. It usually causes short-term illness with fatigue, jaundice, fever, and abdominal pain, but does not lead to chronic disease.",
-        "prevention": "Vaccination, safe food and water practices, and proper sanitation are effective preventive measures.",
-        "care": "No specific treatment. Supportive care with rest, hydration, and good nutrition helps recovery. Most people recover fully within weeks to months."
-    },
-    "hepatitis_b": {
-        "title": "Hepatitis B",
-        "info": "Hepatitis B is a viral infection that can cause both acute and chronic liver disease. It spreads through blood, sexual contact, or from mother to child during birth. Chronic infection increases the risk of liver cirrhosis and liver cancer.",
-        "prevention": "Vaccination is the best prevention. Safe sex practices, avoiding sharing needles, and screening blood products are important.",
-        "care": "Acute cases may only need supportive care. Chronic cases may require antiviral medications such as tenofovir or entecavir, and regular monitoring for liver damage."
-    },
-    "hepatitis_c": {
-        "title": "Hepatitis C",
-        "info": "Hepatitis C is a bloodborne viral infection that can cause both acute and chronic liver disease, often progressing silently for years before symptoms appear. Chronic infection can lead to cirrhosis and liver cancer.",
-        "prevention": "No vaccine is available. Prevention involves avoiding needle sharing, safe blood transfusion practices, and safe sex practices.",
-        "care": "Direct-acting antiviral (DAA) medications can cure most cases. Regular monitoring of liver function is important in chronic cases."
-    },
-    "ebola": {
-        "title": "Ebola Virus Disease",
-        "info": "Ebola is a severe, often fatal viral hemorrhagic fever. It spreads through direct contact with blood or bodily fluids of infected individuals or animals. Symptoms include fever, vomiting, diarrhea, bleeding, and organ failure.",
-        "prevention": "Avoid contact with infected individuals, animals, or contaminated materials. Strict infection control practices in healthcare settings are essential.",
-        "care": "Supportive treatment with fluids, electrolytes, oxygen therapy, and treatment of complications improves survival. Experimental antivirals and monoclonal antibodies may be used in outbreaks."
-    },
-    "zika": {
-        "title": "Zika Virus",
-        "info": "Zika is a mosquito-borne viral infection that usually causes mild symptoms like fever, rash, joint pain, and conjunctivitis. However, infection during pregnancy can cause birth defects, including microcephaly.",
-        "prevention": "Prevent mosquito bites by using repellents, nets, and eliminating standing water. Pregnant women should avoid traveling to Zika-affected areas.",
-        "care": "No specific treatment. Supportive care with rest, hydration, and fever management is recommended. Most people recover fully."
-    },
-    "yellow_fever": {
-        "title": "Yellow Fever",
-        "info": "Yellow fever is a mosquito-borne viral infection causing fever, jaundice, bleeding, and organ failure in severe cases. It is common in parts of Africa and South America.",
-        "prevention": "Vaccination is highly effective. Mosquito bite prevention and vector control are also important.",
-        "care": "No specific antiviral treatment. Supportive care includes rest, hydration, and treatment of symptoms. Severe cases may require intensive care."
-    },
-    "leprosy": {
-        "title": "Leprosy (Hansen’s Disease)",
-        "info": "Leprosy is a chronic infectious disease caused by Mycobacterium leprae, affecting the skin, nerves, and mucous membranes. It leads to skin lesions, numbness, and deformities if untreated.",
-        "prevention": "Early detection and treatment help prevent transmission. Avoid prolonged contact with untreated patients.",
-        "care": "Multidrug therapy (MDT) with dapsone, rifampicin, and clofazimine is effective. Rehabilitation and reconstructive surgery may be needed in advanced cases."
-    },
-    "plague": {
-        "title": "Plague",
-        "info": "Plague is a severe bacterial infection caused by Yersinia pestis, spread through flea bites or contact with infected animals. Forms include bubonic (swollen lymph nodes), septicemic (blood infection), and pneumonic (lung infection).",
-        "prevention": "Control rodent populations, use insect repellents, and avoid contact with infected animals. Protective measures are crucial during outbreaks.",
-        "care": "Prompt antibiotic treatment with streptomycin, gentamicin, or doxycycline is lifesaving. Supportive care may be required in severe cases."
-    },
-    "meningitis": {
-        "title": "Meningitis",
-        "info": "Meningitis is inflammation of the protective membranes around the brain and spinal cord, caused by bacteria, viruses, or fungi. Symptoms include severe headache, stiff neck, fever, sensitivity to light, and confusion.",
-        "prevention": "Vaccination (against meningococcal, pneumococcal, and Hib bacteria), good hygiene, and prompt treatment of infections help prevent meningitis.",
-        "care": "Bacterial meningitis requires urgent intravenous antibiotics and corticosteroids. Viral meningitis is usually milder and treated with supportive care."
-    },
-    "polio": {
-        "title": "Poliomyelitis (Polio)",
-        "info": "Polio is a viral disease that can cause paralysis by attacking the nervous system. It mainly affects children under 5 and spreads through contaminated food, water, or contact with an infected person.",
-        "prevention": "Polio vaccination (OPV or IPV) is the best protection. Maintaining hygiene and sanitation also prevents spread.",
-        "care": "No cure exists. Supportive treatment includes physical therapy, mobility aids, and managing complications. Vaccination remains the key to eradication."
-    },
-    "tetanus": {
-        "title": "Tetanus",
-        "info": "Tetanus is a bacterial infection caused by *Clostridium tetani*, which produces a toxin affecting the nervous system. It leads to painful muscle stiffness and spasms, often starting with lockjaw, and can be life-threatening without treatment.",
-        "prevention": "Routine tetanus vaccination (DTaP, Td, or Tdap) and proper wound care are highly effective preventive measures.",
-        "care": "Immediate administration of tetanus antitoxin (immunoglobulin), antibiotics, muscle relaxants, and supportive hospital care."
-    },
-    "rabies": {
-        "title": "Rabies",
-        "info": "Rabies is a deadly viral infection transmitted through bites or saliva of infected animals. Once symptoms appear—such as hydrophobia, agitation, or paralysis—it is almost always fatal.",
-        "prevention": "Vaccination for pets, avoiding stray animals, and post-exposure prophylaxis (PEP) after suspected exposure.",
-        "care": "Urgent wound cleaning, rabies vaccination, and rabies immunoglobulin administration immediately after exposure. No cure exists once symptoms develop."
-    },
-    "hiv_aids": {
-        "title": "HIV/AIDS",
-        "info": "Human Immunodeficiency Virus (HIV) weakens the immune system, making the body vulnerable to infections. If untreated, it progresses to Acquired Immunodeficiency Syndrome (AIDS).",
-        "prevention": "Safe sex practices, not sharing needles, HIV testing and screening of blood products, and preventive medications (PrEP).",
-        "care": "Antiretroviral therapy (ART) is lifelong treatment that suppresses the virus, allowing patients to live long, healthy lives."
-    },
-    "measles": {
-        "title": "Measles",
-        "info": "Measles is a highly contagious viral disease that causes fever, cough, runny nose, red eyes, and a widespread skin rash. Complications may include pneumonia, encephalitis, or death in severe cases.",
-        "prevention": "MMR (measles, mumps, rubella) vaccination provides effective prevention.",
-        "care": "No specific antiviral treatment. Supportive care includes rest, hydration, fever management, and vitamin A supplementation."
-    },
-    "mumps": {
-        "title": "Mumps",
-        "info": "Mumps is a viral infection that causes swelling of the salivary glands, fever, headache, and muscle aches. In some cases, it can cause complications such as meningitis, orchitis, or hearing loss.",
-        "prevention": "MMR vaccination is the best preventive measure.",
-        "care": "No specific treatment. Supportive care with rest, hydration, and pain relievers helps recovery."
-    },
-    "rubella": {
-        "title": "Rubella (German Measles)",
-        "info": "Rubella is a mild viral illness causing rash, low fever, and joint pain. While generally mild, infection during pregnancy can cause congenital rubella syndrome (CRS), leading to serious birth defects.",
-        "prevention": "MMR vaccination provides effective prevention.",
-        "care": "Supportive care includes rest, hydration, and pain relief. No specific antiviral exists."
-    },
-    "chikungunya": {
-        "title": "Chikungunya",
-        "info": "Chikungunya is a mosquito-borne viral disease characterized by sudden fever and severe joint pain. Other symptoms may include headache, rash, and fatigue. Although rarely fatal, joint pain can persist for months.",
-        "prevention": "Mosquito control, repellents, protective clothing, and community awareness reduce spread.",
-        "care": "No specific treatment. Supportive care with fluids, rest, and pain relievers (paracetamol, not aspirin) is recommended."
-    },
-    "hantavirus": {
-        "title": "Hantavirus Pulmonary Syndrome (HPS)",
-        "info": "Hantavirus is a rare but severe respiratory disease transmitted through contact with infected rodent droppings, urine, or saliva. It causes fever, muscle aches, and rapidly progressing respiratory failure.",
-        "prevention": "Avoid rodent exposure by sealing homes, cleaning safely, and using protective gear in barns or sheds.",
-        "care": "No specific cure exists. Supportive hospital care with oxygen therapy and intensive monitoring improves survival."
-    },
-    "ringworm": {
-        "title": "Ringworm (Dermatophytosis)",
-        "info": "Ringworm is a contagious fungal infection of the skin, scalp, or nails. It appears as red, circular, itchy patches on the skin. It spreads through contact with infected people, animals, or contaminated surfaces.",
-        "prevention": "Maintain good hygiene, keep skin dry, avoid sharing towels or clothing, and treat pets if infected.",
-        "care": "Topical antifungal creams (clotrimazole, terbinafine) or oral antifungals for severe infections."
-    },
-    "athletes_foot": {
-        "title": "Athlete’s Foot (Tinea Pedis)",
-        "info": "Athlete’s foot is a fungal infection that usually begins between the toes, causing itching, burning, and peeling skin. It thrives in warm, moist environments like sweaty shoes.",
-        "prevention": "Keep feet clean and dry, wear breathable footwear, and avoid walking barefoot in public showers or pools.",
-        "care": "Topical antifungal creams or powders. Severe cases may need oral antifungal medication."
-    }
-}
-
-    # add your other diseases here ...
-
-# === Helper: fuzzy disease matching ===
-def match_disease(name: str):
-    diseases = list(KNOWLEDGE_BASE.keys())
-    best_match = difflib.get_close_matches(name.lower(), diseases, n=1, cutoff=0.6)
-    return best_match[0] if best_match else None
-
-# === Chat State (memory) ===
-chat_state = {"current_disease": None}
-
-def get_bot_response(user_message: str) -> str:
-    user_message = user_message.lower().strip()
-    words = user_message.split()
-
-    # --- Handle greetings ---
-    greetings = ["hello", "hi", "hey", "good morning", "good evening"]
-    if any(greet in user_message for greet in greetings):
-        return "Hello! 👋 I’m HealthBot. I can provide information on diseases, their symptoms, prevention, and care. Try asking me about dengue, malaria, or another disease."
-
-    disease = None
-    category = None
-
-    # Detect disease
-    for word in words:
-        if match_disease(word):
-            disease = match_disease(word)
-            break
-
-    # Detect category
-    for w in ["symptoms", "info", "prevention", "care", "treatment"]:
-        if w in words:
-            category = w
-            break
-
-    # Case 1: disease + category given
-    if disease and category:
-        if "symptom" in category or "info" in category:
-            return KNOWLEDGE_BASE[disease]["info"]
-        elif "prevent" in category:
-            return KNOWLEDGE_BASE[disease]["prevention"]
-        elif "care" in category or "treatment" in category:
-            return KNOWLEDGE_BASE[disease]["care"]
-
-    # Case 2: only disease given
-    if disease and not category:
-        chat_state["current_disease"] = disease
-        return f"You asked about {KNOWLEDGE_BASE[disease]['title']}. Do you want to know about 'symptoms', 'prevention', or 'care'?"
-
-    # Case 3: already stored disease, now expecting category
-    if chat_state["current_disease"] and not disease:
-        d = chat_state["current_disease"]
-        if "symptom" in user_message or "info" in user_message:
-            chat_state["current_disease"] = None
-            return KNOWLEDGE_BASE[d]["info"]
-        elif "prevent" in user_message:
-            chat_state["current_disease"] = None
-            return KNOWLEDGE_BASE[d]["prevention"]
-        elif "care" in user_message or "treatment" in user_message:
-            chat_state["current_disease"] = None
-            return KNOWLEDGE_BASE[d]["care"]
-        else:
-            return "Please type 'symptoms', 'prevention', or 'care'."
-
-    # Fallback
-    return "Sorry, I didn’t recognize that. Try again (e.g., 'dengue prevention')."
-
-# === FastAPI Setup ===
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-class ChatRequest(BaseModel):
-    message: str
-
-@app.post("/chat")
-def chat(req: ChatRequest):
-    reply = get_bot_response(req.message)
-    return {"reply": reply}
-@app.get("/")
-def read_root():
-    return {"Hello": "World"}
-
-
-
-
-
+import asyncio
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError
+
+from admission import AdmissionController, AdmissionMiddleware
+from cache import ResponseCache
+from frontend import Frontend
+from knowledge_base import load_knowledge_base
+from matching import DiseaseMatcher, normalize_words
+from metrics import Metrics
+from payloads import ReplyPayloads, dumps, loads
+from retrieval import STOPWORDS, DiseaseRetriever, stem, tokenize
+from similarity import SimilarityEngine
+from sessions import MemorySessionStore, create_session_store, new_state
+
+logger = logging.getLogger("uvicorn.error")
+
+# === Metrics ===
+# Served on /metrics. Under gunicorn each worker writes snapshots to
+# HEALTHBOT_METRICS_DIR (set in gunicorn.conf.py) so any worker can report
+# totals for all of them.
+metrics = Metrics(os.environ.get("HEALTHBOT_METRICS_DIR"))
+METRICS_FLUSH_INTERVAL = float(os.environ.get("HEALTHBOT_METRICS_FLUSH_INTERVAL", "1"))
+metrics.histogram("healthbot_stage_seconds", "Time spent in each step of answering a message.")
+metrics.histogram("healthbot_request_seconds", "HTTP request latency, including streaming.")
+metrics.counter("healthbot_requests_total", "HTTP requests by path and status.")
+metrics.counter("healthbot_replies_total", "Replies by kind; fallback kinds mean no direct answer.")
+metrics.counter("healthbot_disease_match_total", "Disease detection outcomes (exact, fuzzy, miss).")
+metrics.counter("healthbot_response_cache_hits_total", "Reply cache hits.")
+metrics.counter("healthbot_response_cache_misses_total", "Reply cache misses.")
+metrics.counter("healthbot_response_cache_evictions_total", "Reply cache LRU evictions.")
+metrics.gauge("healthbot_response_cache_entries", "Replies currently cached.")
+metrics.gauge("healthbot_kb_diseases", "Diseases in the loaded knowledge base.", merge="max")
+metrics.gauge("healthbot_ws_connections", "Open WebSocket conversations.")
+metrics.counter("healthbot_admission_total", "Admission decisions for /chat requests.")
+metrics.gauge("healthbot_admission_active", "/chat requests being handled.")
+metrics.gauge("healthbot_admission_waiting", "/chat requests queued for a slot.")
+
+# === Load lightweight NLP (lazy, optional) ===
+# spaCy is only imported the first time a feature asks for the pipeline, so
+# workers that never need it don't pay for it. Set HEALTHBOT_PRELOAD_NLP=1 to
+# build it at import instead; with gunicorn's preload_app (gunicorn.conf.py)
+# that happens once in the master and workers share it copy-on-write.
+# get_nlp() returns None when spaCy isn't installed.
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                try:
+                    import spacy
+                except ImportError:
+                    logger.warning("spaCy is not installed; NLP features are disabled")
+                    _nlp = False
+                else:
+                    nlp = spacy.blank("en")
+                    if "sentencizer" not in nlp.pipe_names:
+                        nlp.add_pipe("sentencizer")
+                    _nlp = nlp
+    return _nlp or None
+
+if os.environ.get("HEALTHBOT_PRELOAD_NLP") == "1":
+    get_nlp()
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+@lru_cache(maxsize=4096)
+def split_sentences(text: str) -> tuple:
+    """Sentences of a reply, for streaming. Replies come from a small fixed
+    set, so results are cached; without spaCy a simple regex is used."""
+    nlp = get_nlp()
+    sentences = []
+    for line in text.splitlines():
+        if nlp is not None:
+            sentences.extend(s.text.strip() for s in nlp(line).sents)
+        else:
+            sentences.extend(_SENTENCE_END.split(line))
+    return tuple(s for s in sentences if s.strip())
+
+# === Knowledge Base ===
+# Diseases live in knowledge_base.json; add entries there, no deploy needed.
+# The file is compiled to a memory-mapped .hbkb next to it (see
+# knowledge_base.py) so workers share its pages.
+KB_PATH = os.environ.get(
+    "HEALTHBOT_KB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.json"),
+)
+
+# Fixed replies; with the KB sections they make up nearly every answer.
+GREETING_REPLY = "Hello! 👋 I’m HealthBot. I can provide information on diseases, their symptoms, prevention, and care. Try asking me about dengue, malaria, or another disease."
+PROMPT_REPLY = "You asked about {title}. Do you want to know about 'symptoms', 'prevention', or 'care'?"
+REPROMPT_REPLY = "Please type 'symptoms', 'prevention', or 'care'."
+FALLBACK_REPLY = "Sorry, I didn’t recognize that. Try again (e.g., 'dengue prevention')."
+
+def fixed_replies(knowledge_base):
+    """Replies built by the app rather than read from the KB text, which stays
+    in the shared mmap."""
+    yield from (GREETING_REPLY, REPROMPT_REPLY, FALLBACK_REPLY)
+    for entry in knowledge_base.values():
+        yield PROMPT_REPLY.format(title=entry["title"])
+
+# The KB and everything derived from it, swapped as one object on reload so a
+# request never pairs new indexes with an old KB. Read it once per request.
+#   matcher: phrase automaton over keys, titles and aliases, plus a fuzzy
+#   index with the same results as difflib.get_close_matches(cutoff=0.6)
+#   retriever: BM25 index over the info/prevention/care text
+#   similarity: hashed TF-IDF matrix of the same sections (NumPy)
+#   payloads: /chat response JSON for every fixed reply, pre-encoded
+#   (KB sections are encoded per response from the mmap)
+Knowledge = namedtuple(
+    "Knowledge", "kb matcher retriever similarity payloads generation source_mtime_ns load_ms loaded_at"
+)
+
+def build_knowledge(knowledge_base, generation: int = 0, source_mtime_ns=None,
+                    started=None, previous: Optional[Knowledge] = None) -> Knowledge:
+    started = started or time.perf_counter()
+    matcher = DiseaseMatcher(knowledge_base, cutoff=0.6)
+    # Only sections whose text changed since `previous` are re-indexed.
+    retriever = DiseaseRetriever.build(knowledge_base, previous.retriever if previous else None)
+    similarity = SimilarityEngine(knowledge_base)
+    payloads = ReplyPayloads(fixed_replies(knowledge_base))
+    load_ms = (time.perf_counter() - started) * 1000
+    return Knowledge(
+        knowledge_base, matcher, retriever, similarity, payloads,
+        generation, source_mtime_ns, load_ms, time.time(),
+    )
+
+def load_knowledge(path: str = KB_PATH, generation: int = 0, previous: Optional[Knowledge] = None) -> Knowledge:
+    started = time.perf_counter()
+    mtime = os.stat(path).st_mtime_ns
+    snapshot = build_knowledge(load_knowledge_base(path), generation, mtime, started, previous)
+    logger.info(
+        "Loaded %d diseases from %s in %.1f ms (generation %d)",
+        len(snapshot.kb), path, snapshot.load_ms, generation,
+    )
+    return snapshot
+
+knowledge = load_knowledge()
+
+def match_disease(name: str):
+    return knowledge.matcher.fuzzy.lookup(name.lower())
+
+# === Response cache ===
+# Replies depend only on the normalized message and the session's current
+# disease, so both go in the key; the value carries the reply and the state
+# it leaves behind. Set HEALTHBOT_CACHE_SIZE=0 to disable.
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("HEALTHBOT_CACHE_SIZE", "50000")),
+    ttl=float(os.environ.get("HEALTHBOT_CACHE_TTL", "600")),
+)
+
+def _swap_knowledge(snapshot: Knowledge):
+    global knowledge
+    knowledge = snapshot
+    # Keys carry the generation, so stale entries could never be served;
+    # this just frees them.
+    response_cache.clear()
+
+def set_knowledge_base(knowledge_base):
+    """Swap in an in-memory knowledge base (tests, benchmarks)."""
+    _swap_knowledge(build_knowledge(knowledge_base, knowledge.generation + 1, previous=knowledge))
+
+# === Hot reload ===
+# Each worker reloads when the source file changes (checked every
+# HEALTHBOT_KB_CHECK_INTERVAL seconds, 0 to disable). POST /admin/reload
+# reloads the worker that receives it at once and touches the file so every
+# other worker follows within one check interval. (No signal: under gunicorn
+# a signal reaches one process, and USR2/HUP on the master mean upgrade and
+# restart.) The new snapshot is built off to the side and swapped in, so
+# requests keep being served from the old one meanwhile.
+KB_CHECK_INTERVAL = float(os.environ.get("HEALTHBOT_KB_CHECK_INTERVAL", "5"))
+_reload_lock = threading.Lock()
+_watcher_stop = threading.Event()
+
+def reload_knowledge(force: bool = False) -> bool:
+    with _reload_lock:
+        if not force and os.stat(KB_PATH).st_mtime_ns == knowledge.source_mtime_ns:
+            return False
+        _swap_knowledge(load_knowledge(KB_PATH, knowledge.generation + 1, knowledge))
+        return True
+
+def _watch_knowledge_base():
+    while not _watcher_stop.wait(KB_CHECK_INTERVAL or None):
+        try:
+            reload_knowledge()
+        except Exception:
+            logger.exception("Knowledge base reload failed; keeping generation %d", knowledge.generation)
+
+# === Chat State (memory) ===
+# Keyed by the session id the client sends with each /chat request.
+session_store = create_session_store()
+
+async def store_call(method, *args):
+    """Call a session_store method from async code. The memory store is a dict
+    lookup; any other store does I/O and runs in the threadpool so it can't
+    stall the event loop."""
+    if isinstance(session_store, MemorySessionStore):
+        return method(*args)
+    return await run_in_threadpool(method, *args)
+
+GREETINGS = ["hello", "hi", "hey", "good morning", "good evening"]
+CATEGORIES = ["symptoms", "info", "prevention", "care", "treatment"]
+SEARCH_TOP_K = int(os.environ.get("HEALTHBOT_SEARCH_TOP_K", "3"))
+# Words never fuzzy-matched to a disease name ("prevention" is close enough
+# to "hypertension" for difflib).
+NOT_DISEASE_WORDS = frozenset(CATEGORIES) | STOPWORDS
+# Minimum cosine score for the symptom-similarity fallback.
+SIMILARITY_THRESHOLD = float(os.environ.get("HEALTHBOT_SIMILARITY_THRESHOLD", "0.25"))
+# The similarity fallback needs a description: at least this many distinct
+# content words that aren't category words.
+MIN_SIMILARITY_TERMS = 2
+CATEGORY_TERMS = frozenset(stem(w) for w in CATEGORIES)
+
+# Everything get_bot_response derives from the message alone (no state), so
+# batches can compute it once per distinct message.
+#   similar: symptom-similarity matches, or None until someone needs them;
+#   () when the message is too short to be a description
+#   tentative: the disease is only a fuzzy match on a word of the KB text
+#   ("rash" ~ "rabies") in a longer message, which is more likely describing
+#   symptoms; a similarity match, if there is one, is answered instead
+Analysis = namedtuple("Analysis", "message greeting disease category similar tentative")
+
+def analyze_message(user_message: str, snapshot: Knowledge) -> Analysis:
+    user_message = user_message.lower().strip()
+    words = user_message.split()
+
+    # --- Handle greetings --- (whole words, so "which" isn't "hi")
+    started = time.perf_counter()
+    padded = " " + " ".join(normalize_words(user_message)) + " "
+    greeting = any(f" {greet} " in padded for greet in GREETINGS)
+    now = time.perf_counter()
+    metrics.observe("healthbot_stage_seconds", now - started, stage="greeting")
+    if greeting:
+        return Analysis(user_message, True, None, None, None, False)
+
+    # Detect disease: first exact name/alias mention, else first fuzzy word
+    # match, leaving out category words and stopwords.
+    started = now
+    disease, how, fuzzy_word = snapshot.matcher.match(user_message, words, skip=NOT_DISEASE_WORDS.__contains__)
+    tentative = (
+        how == "fuzzy" and len(words) > 1
+        and any(snapshot.retriever.knows(w) for w in normalize_words(fuzzy_word))
+    )
+    now = time.perf_counter()
+    metrics.observe("healthbot_stage_seconds", now - started, stage="disease_match")
+    metrics.inc("healthbot_disease_match_total", result=how or "miss")
+
+    # Detect category
+    started = now
+    category = None
+    for w in CATEGORIES:
+        if w in words:
+            category = w
+            break
+    metrics.observe("healthbot_stage_seconds", time.perf_counter() - started, stage="category")
+
+    similar = None
+    if (not disease or tentative) and (category or len(set(tokenize(user_message)) - CATEGORY_TERMS) < MIN_SIMILARITY_TERMS):
+        similar = ()
+    return Analysis(user_message, False, disease, category, similar, tentative)
+
+def find_similar(user_message: str, snapshot: Knowledge):
+    started = time.perf_counter()
+    similar = snapshot.similarity.top([user_message], SEARCH_TOP_K, SIMILARITY_THRESHOLD)[0]
+    metrics.observe("healthbot_stage_seconds", time.perf_counter() - started, stage="similarity")
+    return similar
+
+def similarity_reply(similar, kb) -> str:
+    lines = [f"• {kb[key]['title']}" for key, _ in similar]
+    return (
+        "Based on what you describe, it could be related to:\n"
+        + "\n".join(lines)
+        + "\nAsk me about one of them for symptoms, prevention, or care. "
+        "This is not a diagnosis; please see a doctor if you feel unwell."
+    )
+
+def respond(analysis: Analysis, chat_state: dict, snapshot: Knowledge):
+    """(reply, kind) for an analyzed message; kind labels the replies metric."""
+    user_message, greeting, disease, category, similar, tentative = analysis
+    kb = snapshot.kb
+
+    if greeting:
+        return GREETING_REPLY, "greeting"
+
+    if tentative:
+        if similar is None:
+            similar = find_similar(user_message, snapshot)
+        if similar:
+            return similarity_reply(similar, kb), "similarity"
+
+    # Case 1: disease + category given
+    if disease and category:
+        if "symptom" in category or "info" in category:
+            return kb[disease]["info"], "answer"
+        elif "prevent" in category:
+            return kb[disease]["prevention"], "answer"
+        elif "care" in category or "treatment" in category:
+            return kb[disease]["care"], "answer"
+
+    # Case 2: only disease given
+    if disease and not category:
+        chat_state["current_disease"] = disease
+        return PROMPT_REPLY.format(title=kb[disease]["title"]), "prompt"
+
+    # Case 3: already stored disease, now expecting category
+    if chat_state["current_disease"] not in kb:
+        chat_state["current_disease"] = None  # dropped by a KB reload
+    if chat_state["current_disease"] and not disease:
+        d = chat_state["current_disease"]
+        if "symptom" in user_message or "info" in user_message:
+            chat_state["current_disease"] = None
+            return kb[d]["info"], "follow_up"
+        elif "prevent" in user_message:
+            chat_state["current_disease"] = None
+            return kb[d]["prevention"], "follow_up"
+        elif "care" in user_message or "treatment" in user_message:
+            chat_state["current_disease"] = None
+            return kb[d]["care"], "follow_up"
+        else:
+            return REPROMPT_REPLY, "reprompt"
+
+    # A category but no disease to apply it to
+    if category:
+        return FALLBACK_REPLY, "fallback"
+
+    # Fallback 1: symptom-style description close to a KB section
+    if similar is None:
+        similar = find_similar(user_message, snapshot)
+    if similar:
+        return similarity_reply(similar, kb), "similarity"
+
+    # Fallback 2: ranked full-text search over the KB sections
+    started = time.perf_counter()
+    results = snapshot.retriever.search(user_message, SEARCH_TOP_K)
+    metrics.observe("healthbot_stage_seconds", time.perf_counter() - started, stage="retrieval")
+    if results:
+        lines = [f"• {kb[key]['title']}: {snippet}" for key, _, snippet, _ in results]
+        return (
+            "I couldn’t find a disease by that name, but these look related:\n"
+            + "\n".join(lines)
+            + "\nAsk me about one of them for symptoms, prevention, or care.",
+            "search",
+        )
+
+    # Fallback 3
+    return FALLBACK_REPLY, "fallback"
+
+def _cached_response(user_message: str, chat_state: dict, snapshot: Knowledge, analyze=analyze_message) -> str:
+    key = (user_message.lower().strip(), chat_state["current_disease"], snapshot.generation)
+    hit = response_cache.get(key)
+    if hit is not None:
+        reply, chat_state["current_disease"], kind = hit
+    else:
+        reply, kind = respond(analyze(user_message, snapshot), chat_state, snapshot)
+        response_cache.put(key, (reply, chat_state["current_disease"], kind))
+    metrics.inc("healthbot_replies_total", kind=kind)
+    return reply
+
+def get_bot_response(user_message: str, chat_state: Optional[dict] = None) -> str:
+    if chat_state is None:
+        chat_state = new_state()
+    return _cached_response(user_message, chat_state, knowledge)
+
+def get_bot_responses(messages: List[str], chat_states: List[dict]) -> List[str]:
+    """Batch form of get_bot_response. States are updated in message order, so
+    several messages of one conversation must share the same state dict."""
+    snapshot = knowledge
+    analyses = {message: analyze_message(message, snapshot) for message in messages}
+
+    # Score every message that may need the similarity fallback in one go.
+    pending = [
+        m for m, a in analyses.items()
+        if not a.greeting and (not a.disease or a.tentative) and a.similar is None
+    ]
+    if pending:
+        started = time.perf_counter()
+        similar = snapshot.similarity.top(pending, SEARCH_TOP_K, SIMILARITY_THRESHOLD)
+        metrics.observe("healthbot_stage_seconds", time.perf_counter() - started, stage="similarity_batch")
+        for message, matches in zip(pending, similar):
+            analyses[message] = analyses[message]._replace(similar=matches)
+
+    def analyze(message, snapshot):
+        return analyses[message]
+
+    return [
+        _cached_response(message, chat_state, snapshot, analyze)
+        for message, chat_state in zip(messages, chat_states)
+    ]
+
+# === Admission control ===
+# Per worker: at most HEALTHBOT_MAX_CONCURRENT /chat requests in flight, up to
+# HEALTHBOT_MAX_QUEUE more waiting at most HEALTHBOT_QUEUE_TIMEOUT seconds;
+# the rest get 503 + Retry-After right away, as does everything while the
+# event loop runs more than HEALTHBOT_QUEUE_TIMEOUT behind. With
+# HEALTHBOT_PRIORITIZE_SESSIONS=1, requests continuing a stored conversation
+# jump the queue. HEALTHBOT_MAX_CONCURRENT=0 turns it off.
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get("HEALTHBOT_MAX_CONCURRENT", "64")),
+    max_queue=int(os.environ.get("HEALTHBOT_MAX_QUEUE", "128")),
+    queue_timeout=float(os.environ.get("HEALTHBOT_QUEUE_TIMEOUT", "1")),
+)
+RETRY_AFTER = float(os.environ.get("HEALTHBOT_RETRY_AFTER", "1"))
+PRIORITIZE_SESSIONS = os.environ.get("HEALTHBOT_PRIORITIZE_SESSIONS", "1") == "1"
+
+async def _continues_session(body: bytes) -> bool:
+    try:
+        data = loads(body)
+    except ValueError:
+        return False
+    session_id = data.get("session_id") if isinstance(data, dict) else None
+    return isinstance(session_id, str) and await store_call(session_store.__contains__, session_id)
+
+def _collect_metrics():
+    stats = response_cache.stats()
+    metrics.set_counter("healthbot_response_cache_hits_total", stats["hits"])
+    metrics.set_counter("healthbot_response_cache_misses_total", stats["misses"])
+    metrics.set_counter("healthbot_response_cache_evictions_total", stats["evictions"])
+    metrics.set_gauge("healthbot_response_cache_entries", stats["size"])
+    metrics.set_gauge("healthbot_kb_diseases", len(knowledge.kb))
+    metrics.set_gauge("healthbot_ws_connections", _ws_connections)
+    for event in ("admitted", "queued", "rejected", "timed_out", "shed", "late"):
+        metrics.set_counter("healthbot_admission_total", getattr(admission, event), event=event)
+    metrics.set_gauge("healthbot_admission_active", admission.active)
+    metrics.set_gauge("healthbot_admission_waiting", admission.waiting)
+
+metrics.add_collector(_collect_metrics)
+
+def _flush_metrics():
+    while not _watcher_stop.wait(METRICS_FLUSH_INTERVAL):
+        try:
+            metrics.flush()
+        except OSError:
+            logger.exception("Writing metrics snapshot failed")
+
+# === FastAPI Setup ===
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watcher = threading.Thread(target=_watch_knowledge_base, name="kb-watcher", daemon=True)
+    watcher.start()
+    if metrics.directory:
+        threading.Thread(target=_flush_metrics, name="metrics-flush", daemon=True).start()
+    yield
+    _watcher_stop.set()
+    metrics.flush()
+
+# Pure ASGI rather than @app.middleware("http"): no extra task per request,
+# and streamed responses are timed until their last chunk.
+_TIMED_PATHS = frozenset(("/chat", "/chat/stream", "/chat/batch", "/metrics", "/"))
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            path = scope["path"] if scope["path"] in _TIMED_PATHS else "other"
+            metrics.observe("healthbot_request_seconds", time.perf_counter() - started, path=path)
+            metrics.inc("healthbot_requests_total", path=path, status=str(status))
+
+app = FastAPI(lifespan=lifespan)
+if admission.max_concurrent > 0:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission,
+        paths=("/chat", "/chat/stream", "/chat/batch"),
+        is_priority=_continues_session if PRIORITIZE_SESSIONS else None,
+        retry_after=RETRY_AFTER,
+    )
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Messages are cache keys and go through matching and similarity scoring, so
+# their size is capped: longer ones get a 422 (an error frame on /ws).
+MAX_MESSAGE_LENGTH = int(os.environ.get("HEALTHBOT_MAX_MESSAGE_LENGTH", "2000"))
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., max_length=MAX_MESSAGE_LENGTH)
+    session_id: Optional[str] = None
+
+# /chat and /chat/stream are async: a reply is a few in-memory lookups, so it
+# runs on the event loop instead of queueing for a threadpool slot. Session
+# store I/O still goes to the threadpool (store_call).
+async def _chat_turn(req: ChatRequest):
+    # A request without a session_id starts a fresh session; it is only
+    # stored once a turn gives it something to remember, so one-off
+    # questions don't fill the store with empty sessions.
+    if req.session_id is None:
+        session_id, state = uuid.uuid4().hex, new_state()
+    else:
+        session_id = req.session_id
+        started = time.perf_counter()
+        state = await store_call(session_store.get, session_id)
+        metrics.observe("healthbot_stage_seconds", time.perf_counter() - started, stage="state_lookup")
+    reply = get_bot_response(req.message, state)
+    if req.session_id is not None or state != new_state():
+        started = time.perf_counter()
+        await store_call(session_store.set, session_id, state)
+        metrics.observe("healthbot_stage_seconds", time.perf_counter() - started, stage="state_save")
+    return reply, session_id
+
+def _parse_chat_request(body: bytes) -> ChatRequest:
+    """Like FastAPI's body handling (same 422 errors), with the faster codec."""
+    try:
+        data = loads(body)
+    except ValueError as exc:
+        raise RequestValidationError([{
+            "type": "json_invalid", "loc": ("body", 0), "msg": "JSON decode error",
+            "input": {}, "ctx": {"error": str(exc)},
+        }])
+    try:
+        return ChatRequest.model_validate(data)
+    except ValidationError as exc:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)
+        ])
+
+# The body is parsed and the reply encoded by hand: the reply's JSON comes
+# pre-encoded with the KB snapshot, so there is no per-request dict, encoder
+# pass or response-model validation.
+@app.post(
+    "/chat",
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": ChatRequest.model_json_schema()}},
+    }},
+)
+async def chat(request: Request):
+    reply, session_id = await _chat_turn(_parse_chat_request(await request.body()))
+    started = time.perf_counter()
+    body = knowledge.payloads.encode(reply, session_id)
+    metrics.observe("healthbot_stage_seconds", time.perf_counter() - started, stage="serialization")
+    return Response(body, media_type="application/json")
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {dumps(data).decode()}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """Server-Sent Events: a `session` event, one `data` event per sentence
+    of the reply, then `done` with the full reply."""
+    reply, session_id = await _chat_turn(req)
+    if _nlp is None:
+        # The first stream in a worker builds the pipeline (~0.7 s for the
+        # spaCy import); keep that off the event loop.
+        await run_in_threadpool(get_nlp)
+
+    async def events():
+        yield _sse({"session_id": session_id}, "session")
+        for sentence in split_sentences(reply):
+            yield _sse({"sentence": sentence})
+        yield _sse({"reply": reply}, "done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# === WebSocket conversations ===
+# One socket per conversation: the state lives on the connection, so turns
+# skip the HTTP round trip and preflight. Pass ?session_id= to resume a
+# session shared with /chat. It is saved whenever a turn changes it, not on
+# close: a client whose socket dropped falls back to /chat/stream at once,
+# and the server may only notice the drop a heartbeat or two later, when a
+# save would overwrite the newer state.
+#
+# Client -> server: {"type": "message", "message": "..."} (or plain text),
+#                   {"type": "pong"}
+# Server -> client: {"type": "session", "session_id": "..."},
+#                   {"type": "reply", "reply": "..."}, {"type": "ping"},
+#                   {"type": "error", "error": "..."}
+#
+# The server pings every HEALTHBOT_WS_HEARTBEAT seconds and drops peers that
+# stop answering, closes connections with no messages for
+# HEALTHBOT_WS_IDLE_TIMEOUT seconds, and refuses new ones beyond
+# HEALTHBOT_WS_MAX_CONNECTIONS per worker.
+WS_HEARTBEAT = float(os.environ.get("HEALTHBOT_WS_HEARTBEAT", "20"))
+WS_IDLE_TIMEOUT = float(os.environ.get("HEALTHBOT_WS_IDLE_TIMEOUT", "300"))
+WS_MAX_CONNECTIONS = int(os.environ.get("HEALTHBOT_WS_MAX_CONNECTIONS", "1000"))
+_ws_connections = 0
+
+def _ws_message(raw: str) -> dict:
+    try:
+        data = loads(raw)
+    except ValueError:
+        return {"type": "message", "message": raw}
+    return data if isinstance(data, dict) else {"type": "message", "message": raw}
+
+@app.websocket("/ws")
+async def chat_ws(websocket: WebSocket, session_id: Optional[str] = None):
+    global _ws_connections
+    if _ws_connections >= WS_MAX_CONNECTIONS:
+        await websocket.close(code=1013)  # try again later
+        return
+    # Counted before the first await, so handshakes in flight can't overshoot.
+    _ws_connections += 1
+    session_id = session_id or uuid.uuid4().hex
+    try:
+        await websocket.accept()
+        state = await store_call(session_store.get, session_id)
+        last_message = last_pong = time.monotonic()
+        await websocket.send_json({"type": "session", "session_id": session_id})
+        while True:
+            try:
+                raw = await asyncio.wait_for(websocket.receive_text(), timeout=WS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                now = time.monotonic()
+                if now - last_message >= WS_IDLE_TIMEOUT:
+                    await websocket.close(code=1000, reason="idle")
+                    break
+                if now - last_pong >= 2 * WS_HEARTBEAT:
+                    await websocket.close(code=1001, reason="heartbeat timeout")
+                    break
+                await websocket.send_json({"type": "ping"})
+                continue
+            except KeyError:  # a binary frame has no "text"
+                last_pong = time.monotonic()
+                await websocket.send_json({"type": "error", "error": "expected a text frame"})
+                continue
+
+            data = _ws_message(raw)
+            last_pong = time.monotonic()  # any frame proves the peer is alive
+            if data.get("type") == "pong":
+                continue
+            message = data.get("message")
+            if data.get("type") != "message" or not isinstance(message, str):
+                await websocket.send_json({"type": "error", "error": "expected a message"})
+                continue
+            if len(message) > MAX_MESSAGE_LENGTH:
+                await websocket.send_json({"type": "error", "error": "message too long"})
+                continue
+            last_message = last_pong
+            current_disease = state["current_disease"]
+            reply = get_bot_response(message, state)
+            if state["current_disease"] != current_disease:
+                await store_call(session_store.set, session_id, state)
+            await websocket.send_json({"type": "reply", "reply": reply})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _ws_connections -= 1
+
+MAX_BATCH_SIZE = int(os.environ.get("HEALTHBOT_MAX_BATCH_SIZE", "10000"))
+
+class BatchChatRequest(BaseModel):
+    messages: List[ChatRequest] = Field(..., max_length=MAX_BATCH_SIZE)
+
+# Stays sync: a large batch is real CPU work and shouldn't stall the event loop.
+@app.post("/chat/batch")
+def chat_batch(req: BatchChatRequest):
+    session_ids = [item.session_id for item in req.messages]
+    # One state per distinct session, loaded and saved once for the whole batch.
+    # Messages without a session id are one-off questions: each gets a fresh
+    # state that is not stored, and no session id is handed back.
+    states = {sid: session_store.get(sid) for sid in dict.fromkeys(session_ids) if sid}
+    replies = get_bot_responses(
+        [item.message for item in req.messages],
+        [states[sid] if sid else new_state() for sid in session_ids],
+    )
+    for sid, state in states.items():
+        session_store.set(sid, state)
+    return {
+        "replies": [
+            {"reply": reply, "session_id": sid}
+            for reply, sid in zip(replies, session_ids)
+        ]
+    }
+
+# === Admin ===
+# Disabled unless HEALTHBOT_ADMIN_TOKEN is set; send it as X-Admin-Token.
+ADMIN_TOKEN = os.environ.get("HEALTHBOT_ADMIN_TOKEN")
+
+def _check_admin(token: Optional[str]):
+    if not ADMIN_TOKEN or not secrets.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+def _knowledge_status(snapshot: Knowledge) -> dict:
+    return {
+        "diseases": len(snapshot.kb),
+        "generation": snapshot.generation,
+        "load_ms": round(snapshot.load_ms, 2),
+        "loaded_at": snapshot.loaded_at,
+        "pid": os.getpid(),
+    }
+
+@app.get("/admin/kb")
+def admin_kb(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    return _knowledge_status(knowledge)
+
+@app.post("/admin/reload")
+def admin_reload(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    try:
+        os.utime(KB_PATH)  # new mtime: the other workers' watchers reload too
+    except OSError:
+        logger.warning("Could not touch %s; only worker %d reloads", KB_PATH, os.getpid())
+    try:
+        reload_knowledge(force=True)
+    except Exception as exc:
+        logger.exception("Knowledge base reload failed")
+        raise HTTPException(status_code=500, detail=f"Reload failed: {exc}")
+    return _knowledge_status(knowledge)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition, merged across workers."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# === Frontend ===
+# The chat UI is served by the app itself, so its API calls are same-origin
+# (no CORS preflights) and its assets are compressed and cached (frontend.py).
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+frontend = Frontend(os.path.join(ROOT_DIR, "index.html"), os.path.join(ROOT_DIR, "static"))
+
+@app.get("/", include_in_schema=False)
+async def index(request: Request):
+    return frontend.response("/", request.headers)
+
+@app.get("/static/{name}", include_in_schema=False)
+async def static_file(name: str, request: Request):
+    path = f"/static/{name}"
+    if path not in frontend:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return frontend.response(path, request.headers)
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+
+
+
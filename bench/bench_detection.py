@@ -0,0 +1,70 @@
+"""Disease detection: phrase automaton + fuzzy fallback vs the old per-word loop.
+
+    python bench/bench_detection.py [--repeat N]
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+FILLER = (
+    "i have been feeling unwell for a few days and my family is worried "
+    "about what it could be so please tell me more about it"
+).split()
+
+
+def old_detect(message):
+    # The loop get_bot_response used before the automaton, match_disease twice per hit.
+    keys = list(app.knowledge.kb.keys())
+    for word in message.lower().split():
+        if difflib.get_close_matches(word, keys, n=1, cutoff=0.6):
+            return difflib.get_close_matches(word, keys, n=1, cutoff=0.6)[0]
+    return None
+
+
+def make_message(n_words, mention, rng):
+    words = [rng.choice(FILLER) for _ in range(n_words)]
+    if mention:
+        words[rng.randrange(n_words)] = mention
+    return " ".join(words)
+
+
+def timeit(fn, messages, repeat, setup=None):
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for m in messages:
+            fn(m)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    matcher = app.knowledge.matcher
+    titles = [entry["title"].split("(")[0].strip().lower() for entry in app.knowledge.kb.values()]
+    print(f"{'words':>6} {'old (us)':>10} {'new (us)':>10} {'speedup':>8}")
+    for n_words in (10, 50, 200, 1000):
+        messages = [make_message(n_words, rng.choice(titles + [None]), rng) for _ in range(50)]
+        old = timeit(old_detect, messages, args.repeat)
+        # Cold caches for the new path on every round, so the best of them
+        # isn't just a measure of the LRU.
+        new = timeit(lambda m: matcher.first(m.lower()), messages, args.repeat,
+                     setup=matcher.fuzzy.lookup.cache_clear)
+        print(f"{n_words:>6} {old * 1e6:>10.1f} {new * 1e6:>10.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Bytes sent and round trips per conversation: the old separately hosted page
+calling the API cross-origin vs the page served by the app.
+
+    python bench/bench_frontend.py [--messages N]
+
+"Before" is the single-file page (CSS and JS inline) sent uncompressed, and
+a cross-origin fetch to /chat/stream: a CORS preflight (OPTIONS) precedes
+it. Browsers cache a preflight for Access-Control-Max-Age, so it is counted
+once per conversation, plus the uncached worst case. "After" is the app
+serving the page and fingerprinted assets compressed, with a same-origin
+API. The repeat visit is the page's 304 only; assets come from the browser
+cache. Sizes are response bytes: status line, headers and body (body only
+for the "before" page, which came from another host).
+"""
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app  # noqa: E402
+
+ORIGIN = "https://healthbot.example"
+MESSAGES = ["hello", "dengue", "symptoms", "malaria prevention", "rash and joint pain", "thanks"]
+
+
+def wire_size(response) -> int:
+    head = f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n"
+    head += "".join(f"{k}: {v}\r\n" for k, v in response.headers.items()) + "\r\n"
+    return len(head.encode()) + int(response.headers.get("content-length", len(response.content)))
+
+
+def inline_page() -> bytes:
+    """The page as it was deployed before: one HTML file, CSS and JS inline."""
+    root = app.ROOT_DIR
+    with open(os.path.join(root, "index.html"), encoding="utf-8") as f:
+        html = f.read()
+    for tag, name in (("style", "chat.css"), ("script", "chat.js")):
+        with open(os.path.join(root, "static", name), encoding="utf-8") as f:
+            body = f.read()
+        pattern = r'<link rel="stylesheet" href="/static/chat.css" />' if tag == "style" else r'<script src="/static/chat.js"></script>'
+        html = re.sub(pattern, lambda _: f"<{tag}>\n{body}</{tag}>", html)
+    return html.encode("utf-8")
+
+
+def conversation(client, messages, headers):
+    """Bytes of the /chat/stream replies for one conversation."""
+    total, session_id = 0, None
+    for message in messages:
+        r = client.post("/chat/stream", json={"message": message, "session_id": session_id}, headers=headers)
+        r.raise_for_status()
+        session_id = re.search(r'"session_id":\s*"([^"]+)"', r.text).group(1)
+        total += wire_size(r)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=len(MESSAGES))
+    args = parser.parse_args()
+    messages = (MESSAGES * (args.messages // len(MESSAGES) + 1))[:args.messages]
+
+    with TestClient(app.app) as client:
+        # --- before ---
+        page_before = len(inline_page())
+        preflight = client.options("/chat/stream", headers={
+            "Origin": ORIGIN,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type",
+        })
+        preflight_bytes = wire_size(preflight)
+        max_age = preflight.headers.get("access-control-max-age", "0")
+        chat_before = conversation(client, messages, {"Origin": ORIGIN})
+
+        # --- after ---
+        accept = {"Accept-Encoding": "gzip, deflate, br"}
+        page = client.get("/", headers=accept)
+        assets = re.findall(r'(?:href|src)="(/static/[^"]+)"', page.text)
+        first_after = wire_size(page) + sum(wire_size(client.get(a, headers=accept)) for a in assets)
+        repeat_after = wire_size(client.get("/", headers={**accept, "If-None-Match": page.headers["etag"]}))
+        chat_after = conversation(client, messages, {})
+
+    n = len(messages)
+    print(f"conversation of {n} messages over /chat/stream; preflight max-age {max_age}s\n")
+    print(f"{'':<34} {'before':>10} {'after':>10}")
+    print(f"{'page load, first visit (bytes)':<34} {page_before:>10} {first_after:>10}")
+    print(f"{'page load, repeat visit (bytes)':<34} {page_before:>10} {repeat_after:>10}")
+    print(f"{'preflights (cached / uncached)':<34} {f'1 / {n}':>10} {'0 / 0':>10}")
+    print(f"{'preflight bytes (cached)':<34} {preflight_bytes:>10} {0:>10}")
+    before = page_before + preflight_bytes + chat_before
+    after = first_after + chat_after
+    print(f"{'conversation total, first visit':<34} {before:>10} {after:>10}")
+    print(f"{'round trips, first visit':<34} {1 + 1 + n:>10} {1 + len(assets) + n:>10}")
+    print(f"{'round trips, repeat visit':<34} {1 + 1 + n:>10} {1 + n:>10}")
+
+
+if __name__ == "__main__":
+    main()
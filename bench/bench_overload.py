@@ -0,0 +1,150 @@
+"""Overload behaviour with and without admission control.
+
+    python bench/bench_overload.py [--duration S] [--chat-rate R] [--batch-rate R] [--batch B]
+
+Two cases, each at a fixed arrival rate well above what one worker can serve:
+
+  /chat        async handler, no blocking I/O: the backlog builds up as tasks
+               waiting for the event loop, so the controller has to notice
+               loop lag rather than a full queue
+  /chat/batch  sync handler doing real CPU work in the threadpool (uncached
+               symptom messages): the backlog is requests holding slots
+
+Arrivals are open loop and latency runs from each request's scheduled arrival
+time, so time spent waiting for the event loop counts. Requests are handed to
+the ASGI app directly, one task per arrival as a server would, with no HTTP
+client sharing the event loop. Reported: requests served per second, share
+turned away with 503, and p50/p99 latency of the served ones. Without
+admission control everything is accepted and latency grows with the backlog
+for as long as the spike lasts; with it, latency stays near the queue
+deadline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ["HEALTHBOT_MAX_CONCURRENT"] = "0"  # the app itself unguarded; wrapped below
+os.environ.setdefault("HEALTHBOT_CACHE_SIZE", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app  # noqa: E402
+from admission import AdmissionController, AdmissionMiddleware  # noqa: E402
+from load_test import MESSAGES, percentile  # noqa: E402
+
+WORDS = "fever rash cough pain joint chills sweating itchy skin water diarrhea swollen glands blood headache".split()
+
+
+async def post(asgi_app, path: str, body: bytes) -> int:
+    """One POST straight into the ASGI app; returns the status code."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [
+            (b"content-type", b"application/json"), (b"host", b"bench"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+    status = 0
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # the client never goes away
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await asgi_app(scope, receive, send)
+    return status
+
+
+async def flood(asgi_app, path, make_body, rate, duration):
+    """Open loop: arrivals keep coming at `rate`/s whatever the latency."""
+    served, rejected = [], 0
+    n_requests = int(rate * duration)
+
+    async def one(body, scheduled):
+        nonlocal rejected
+        status = await post(asgi_app, path, body)
+        if status == 503:
+            rejected += 1
+        elif status != 200:
+            raise RuntimeError(f"{path}: status {status}")
+        else:
+            served.append(time.perf_counter() - scheduled)
+
+    started = time.perf_counter()
+    tasks = []
+    for i in range(n_requests):
+        scheduled = started + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(make_body(i), scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "served_rps": len(served) / elapsed,
+        "rejected_pct": 100 * rejected / n_requests,
+        "p50_ms": statistics.median(served) * 1000 if served else 0.0,
+        "p99_ms": percentile(served, 99) * 1000 if served else 0.0,
+    }
+
+
+def chat_body(i):
+    return json.dumps({"message": MESSAGES[i % len(MESSAGES)], "session_id": str(i % 100)}).encode()
+
+
+def batch_body(batch, seed=0):
+    rng = random.Random(seed)
+
+    def make(i):
+        messages = [{"message": " ".join(rng.sample(WORDS, 4)) + f" {i}-{j}"} for j in range(batch)]
+        return json.dumps({"messages": messages}).encode()
+    return make
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--chat-rate", type=float, default=10000, help="/chat arrivals per second")
+    parser.add_argument("--batch-rate", type=float, default=300, help="/chat/batch arrivals per second")
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=0.25)
+    args = parser.parse_args()
+
+    cases = [
+        ("/chat", chat_body, args.chat_rate),
+        ("/chat/batch", batch_body(args.batch), args.batch_rate),
+    ]
+    print(f"{'':<26} {'served/s':>9} {'503 %':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    for path, make_body, rate in cases:
+        guarded = AdmissionMiddleware(
+            app.app,
+            AdmissionController(args.max_concurrent, args.max_queue, args.queue_timeout),
+            paths=(path,),
+        )
+        for name, target in (("no admission", app.app), ("admission", guarded)):
+            r = asyncio.run(flood(target, path, make_body, rate, args.duration))
+            label = f"{path} {name}"
+            print(f"{label:<26} {r['served_rps']:>9.0f} {r['rejected_pct']:>7.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
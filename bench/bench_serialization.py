@@ -0,0 +1,119 @@
+"""/chat request parsing and response encoding: FastAPI's generic path vs
+pre-encoded payloads.
+
+    python bench/bench_serialization.py [--requests N] [--rates 500 1500]
+
+First the encode step alone (per reply, over the fixed reply set), then
+server-side cost per request of both /chat handlers, called as bare ASGI apps
+(no client, so the handler is all that is measured), then open-loop load
+through httpx's ASGI transport (see load_test.py).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from load_test import MESSAGES, run  # noqa: E402
+
+
+def generic_app() -> FastAPI:
+    """/chat as it was: pydantic body, dict result through jsonable_encoder/JSONResponse."""
+    generic = FastAPI()
+    generic.add_middleware(app.RequestMetricsMiddleware)
+    generic.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
+                           allow_methods=["*"], allow_headers=["*"])
+
+    @generic.post("/chat")
+    async def chat(req: app.ChatRequest):
+        reply, session_id = await app._chat_turn(req)
+        return {"reply": reply, "session_id": session_id}
+
+    return generic
+
+
+async def asgi_us(asgi_app, bodies, repeat=3):
+    """Best-of-repeat server time per POST /chat, driving the ASGI app directly."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/chat", "raw_path": b"/chat",
+        "root_path": "", "query_string": b"", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(b"content-type", b"application/json"), (b"host", b"bench")],
+    }
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"status {message['status']}")
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for body in bodies:
+            async def receive(body=body):
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asgi_app(dict(scope), receive, send)
+        best = min(best, time.perf_counter() - start)
+    return best / len(bodies) * 1e6
+
+
+def per_call_us(fn, items, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rates", type=float, nargs="+", default=[500, 1500], help="arrivals per second")
+    parser.add_argument("--duration", type=float, default=2)
+    args = parser.parse_args()
+
+    snapshot = app.knowledge
+    replies = list(app.fixed_replies(snapshot.kb))
+    replies += [entry[section] for entry in snapshot.kb.values() for section in ("info", "prevention", "care")]
+    session_id = "0123456789abcdef0123456789abcdef"
+
+    def generic(reply):
+        content = jsonable_encoder({"reply": reply, "session_id": session_id})
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+    def pre_encoded(reply):
+        return snapshot.payloads.encode(reply, session_id)
+
+    assert all(json.loads(generic(r)) == json.loads(pre_encoded(r)) for r in replies)
+    print(f"encode, {len(replies)} fixed replies and KB sections")
+    print(f"  generic       {per_call_us(generic, replies):8.2f} us/reply")
+    print(f"  pre-encoded   {per_call_us(pre_encoded, replies):8.2f} us/reply")
+
+    targets = {"generic": generic_app(), "pre-encoded": app.app}
+    bodies = [
+        json.dumps({"message": message, "session_id": str(i % 100)}).encode()
+        for i, message in enumerate(MESSAGES * (args.requests // len(MESSAGES)))
+    ]
+    print(f"\nserver time per /chat request, {len(bodies)} requests")
+    for name, target in targets.items():
+        print(f"  {name:<12} {asyncio.run(asgi_us(target, bodies)):8.2f} us")
+
+    print(f"\n{'handler':<14} {'rate':>6} {'served/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for rate in args.rates:
+        for name, target in targets.items():
+            r = asyncio.run(run(target, rate, args.duration))
+            print(f"{name:<14} {rate:>6.0f} {r['rps']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
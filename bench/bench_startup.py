@@ -0,0 +1,54 @@
+"""Worker startup cost: time to import app and peak RSS, with and without spaCy.
+
+    python bench/bench_startup.py [--runs N]
+
+Each configuration is measured in a fresh interpreter, like a new worker.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_ms": elapsed * 1000,
+                  "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+CONFIGS = {
+    "lazy NLP (default)": {"HEALTHBOT_PRELOAD_NLP": "0"},
+    "eager NLP": {"HEALTHBOT_PRELOAD_NLP": "1"},
+}
+
+
+def measure(env_overrides):
+    env = dict(os.environ, HEALTHBOT_KB_CHECK_INTERVAL="0", **env_overrides)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'config':<20} {'import ms (median)':>20} {'max RSS MB':>12}")
+    for name, env in CONFIGS.items():
+        samples = [measure(env) for _ in range(args.runs)]
+        import_ms = statistics.median(s["import_ms"] for s in samples)
+        rss = statistics.median(s["maxrss_mb"] for s in samples)
+        print(f"{name:<20} {import_ms:>20.1f} {rss:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
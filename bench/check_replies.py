@@ -0,0 +1,126 @@
+"""Regression check: replies to common disease questions vs the baseline app.
+
+    python bench/check_replies.py [--baseline REV]
+
+Loads app.py as of REV (default: the repository's first commit) next to the
+current app and asks both the same one-message questions: each disease by
+key, by its first word, and with each category, plus a few common short
+names. Wherever the baseline answered from the knowledge base (a section or
+the "You asked about ..." prompt) the current app must answer too, with the
+same kind of answer about the same disease. It may name a different disease
+only when the message contains a disease name or alias exactly (the
+baseline's word-by-word fuzzy match got "hepatitis a" wrong, for one), and
+may answer differently only when the baseline's disease came from a category
+word or stopword alone ("heart prevention" -> Hypertension, via "prevention").
+Messages in MISREADS must not be answered about the disease listed, whatever
+the baseline did. Exits non-zero and lists the differences otherwise.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("HEALTHBOT_CACHE_SIZE", "0")
+
+import app  # noqa: E402
+
+COMMON = [
+    "covid", "covid symptoms", "diabetes care", "hepatitis", "hepatitis prevention",
+    "aids", "flu", "tb", "malaria", "dengue fever", "heart attack", "common cold",
+    "sugar consumption and diabetes care",
+]
+
+# message -> disease it must not be taken for (an ordinary word that is also
+# an alias or close to a disease name)
+MISREADS = {
+    "cold water": "common_cold",
+    "i feel cold and shivery with fever": "common_cold",
+    "sugar consumption and diabetes care": "tuberculosis",
+    "rash and joint pain": "rabies",
+    "i have joint pain and rash": "rabies",
+}
+
+
+def load_baseline(rev: str):
+    if rev is None:
+        rev = subprocess.run(
+            ["git", "rev-list", "--max-parents=0", "HEAD"],
+            cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout.split()[0]
+    source = subprocess.run(
+        ["git", "show", f"{rev}:app.py"], cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    module = types.ModuleType("baseline_app")
+    exec(compile(source, f"{rev}:app.py", "exec"), module.__dict__)
+    return module
+
+
+def answer_index(kb, prompt):
+    """reply text -> (key, "info" | "prevention" | "care" | "prompt")"""
+    index = {}
+    for key, entry in kb.items():
+        index[prompt.format(title=entry["title"])] = (key, "prompt")
+        for section in ("info", "prevention", "care"):
+            index[entry[section]] = (key, section)
+    return index
+
+
+def questions(kb):
+    seen = dict.fromkeys(COMMON)
+    for key in kb:
+        for name in dict.fromkeys((key.replace("_", " "), key.split("_")[0])):
+            seen[name] = None
+            for category in ("symptoms", "prevention", "care"):
+                seen[f"{name} {category}"] = None
+    return list(seen)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", help="git revision of the reference app.py")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    kb = baseline.KNOWLEDGE_BASE
+    # The baseline's prompt is the same template as app.PROMPT_REPLY.
+    baseline_answers = answer_index(kb, app.PROMPT_REPLY)
+    answers = answer_index(app.knowledge.kb, app.PROMPT_REPLY)
+
+    checked, failures = 0, []
+    for message in questions(kb):
+        baseline.chat_state["current_disease"] = None
+        expected = baseline.get_bot_response(message)
+        if expected not in baseline_answers:
+            continue  # baseline had no answer either
+        got = app.get_bot_response(message)
+        want_key, want_kind = baseline_answers[expected]
+        got_key, got_kind = answers.get(got, (None, None))
+        matcher = app.knowledge.matcher
+        if matcher.detect(message.lower(), skip=app.NOT_DISEASE_WORDS.__contains__) == (None, None):
+            continue  # only a category word or stopword looked like a disease
+        checked += 1
+        _, how = matcher.detect(message.lower())
+        if got_kind != want_kind or (got_key != want_key and how != "exact"):
+            failures.append((message, expected, got))
+
+    misread = []
+    for message, wrong_key in MISREADS.items():
+        got = app.get_bot_response(message)
+        if answers.get(got, (None, None))[0] == wrong_key:
+            misread.append((message, got))
+
+    for message, expected, got in failures:
+        print(f"{message!r}\n  baseline: {expected[:90]}\n  current:  {got[:90]}")
+    for message, got in misread:
+        print(f"{message!r} taken for {MISREADS[message]}\n  current:  {got[:90]}")
+    print(f"{checked} baseline answers checked, {len(failures)} differ; "
+          f"{len(MISREADS)} misreads checked, {len(misread)} found")
+    sys.exit(1 if failures or misread else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""In-process load test: async /chat vs the old threadpool-bound sync handler.
+
+    python bench/load_test.py [--rates 500 1000 2000] [--duration S]
+
+Requests go through httpx's ASGI transport, so there is no socket or server
+in the way: the difference is purely how the handler is scheduled.
+
+Arrivals are open loop: request i is sent at i / rate seconds whatever the
+earlier ones are doing, and its latency runs from that scheduled time. Time
+a request spends waiting because the event loop is busy (which is where an
+async handler's backlog builds up) is counted, so a handler that falls
+behind shows it in p50/p99 and not only in req/s.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+MESSAGES = ["hello", "dengue symptoms", "malaria", "care", "typhoid prevention", "rash and joint pain"]
+
+
+def legacy_app() -> FastAPI:
+    """/chat as it used to be declared: a sync def, run in Starlette's threadpool."""
+    legacy = FastAPI()
+
+    @legacy.post("/chat")
+    def chat(req: app.ChatRequest):
+        session_id = req.session_id or uuid.uuid4().hex
+        state = app.session_store.get(session_id)
+        reply = app.get_bot_response(req.message, state)
+        app.session_store.set(session_id, state)
+        return {"reply": reply, "session_id": session_id}
+
+    return legacy
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def chat_body(i):
+    return {"message": MESSAGES[i % len(MESSAGES)], "session_id": str(i % 100)}
+
+
+async def run(asgi_app, rate, duration, path="/chat", make_body=chat_body):
+    """Send rate * duration requests open loop. 503s are counted as rejected
+    and left out of the latency figures."""
+    transport = httpx.ASGITransport(app=asgi_app)
+    latencies, rejected = [], 0
+    n_requests = max(1, int(rate * duration))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i, scheduled):
+            nonlocal rejected
+            resp = await client.post(path, json=make_body(i))
+            if resp.status_code == 503:
+                rejected += 1
+                return
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - scheduled)
+
+        started = time.perf_counter()
+        tasks = []
+        for i in range(n_requests):
+            scheduled = started + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    if not latencies:
+        latencies = [0.0]
+    return {
+        "rps": (n_requests - rejected) / elapsed,
+        "rejected_pct": 100 * rejected / n_requests,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rates", type=float, nargs="+", default=[500, 1000, 2000], help="arrivals per second")
+    parser.add_argument("--duration", type=float, default=3)
+    args = parser.parse_args()
+
+    targets = {"sync (threadpool)": legacy_app(), "async": app.app}
+    print(f"{'handler':<18} {'rate':>6} {'served/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for rate in args.rates:
+        for name, target in targets.items():
+            r = asyncio.run(run(target, rate, args.duration))
+            print(f"{name:<18} {rate:>6.0f} {r['rps']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""HealthBot benchmark suite.
+
+    python bench/suite.py                       # full run
+    python bench/suite.py --quick               # smaller sizes, for a smoke check
+    python bench/suite.py --compare OLD.json    # flag regressions against a previous run
+
+Three parts:
+  micro    match_disease and get_bot_response over a realistic message corpus
+  scaling  the same on synthetic knowledge bases of 50, 1k and 10k diseases
+  load     in-process open-loop load against /chat at fixed arrival rates:
+           throughput and p50/p95/p99 from each request's scheduled send time
+
+Results are written as flat {"metric": value} JSON (default
+bench/results/<git sha>.json) so runs can be diffed across commits. Metrics
+ending in _us/_ms are lower-is-better, _rps higher-is-better.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app  # noqa: E402
+from load_test import run as load_run  # noqa: E402
+
+
+# === Corpus ===
+
+GREETINGS = ["hello", "hi there", "hey!", "good morning", "good evening doctor"]
+FOLLOW_UPS = ["symptoms", "prevention", "care", "treatment please", "what about prevention"]
+SYMPTOMS = [
+    "rash and joint pain", "fever chills and sweating", "itchy skin between my toes",
+    "which diseases spread through mosquitoes", "contaminated water and diarrhea",
+    "persistent cough with blood", "swollen salivary glands",
+]
+UNKNOWN = ["xyzzy", "what is the weather", "tell me a joke", "asdf qwerty"]
+FILLER = (
+    "i have been feeling unwell for a few days and my family is worried "
+    "about what it could be so please tell me more about it"
+).split()
+
+
+def typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def build_corpus(kb, rng, size=400):
+    """Mix of greetings, exact/typo'd/multi-word disease names with and without
+    a category, follow-ups, symptom descriptions, unknowns and long messages."""
+    titles = [entry["title"].split("(")[0].strip().lower() for entry in kb.values()]
+    keys = list(kb)
+    kinds = [
+        lambda: rng.choice(GREETINGS),
+        lambda: rng.choice(titles),
+        lambda: f"{rng.choice(titles)} {rng.choice(['symptoms', 'prevention', 'care'])}",
+        lambda: typo(rng.choice(keys).split("_")[0], rng),
+        lambda: rng.choice(FOLLOW_UPS),
+        lambda: rng.choice(SYMPTOMS),
+        lambda: rng.choice(UNKNOWN),
+        lambda: " ".join(rng.choice(FILLER) for _ in range(rng.randint(40, 120))) + " " + rng.choice(titles),
+    ]
+    return [rng.choice(kinds)() for _ in range(size)]
+
+
+# === Synthetic knowledge bases ===
+
+SYLLABLES = "ba ri lo ma ten cor vi sa nu pe lar gan to mi zo ke dra phi lum sor".split()
+
+
+def synthetic_kb(n, base_kb, rng):
+    sentences = [s for entry in base_kb.values() for f in ("info", "prevention", "care") for s in entry[f].split(". ")]
+    kb = {}
+    while len(kb) < n:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.3:
+            name += "_" + "".join(rng.choice(SYLLABLES) for _ in range(2))
+        if name in kb:
+            continue
+        kb[name] = {
+            "title": name.replace("_", " ").title(),
+            "info": ". ".join(rng.sample(sentences, 3)),
+            "prevention": ". ".join(rng.sample(sentences, 2)),
+            "care": ". ".join(rng.sample(sentences, 2)),
+        }
+    return kb
+
+
+# === Timing ===
+
+def per_op_us(fn, items, repeat, setup=None):
+    """Median over `repeat` rounds of the mean time per item, in microseconds."""
+    rounds = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        rounds.append((time.perf_counter() - start) / len(items))
+    return statistics.median(rounds) * 1e6
+
+
+def bench_pipeline(prefix, corpus, repeat, results):
+    words = [w for message in corpus for w in message.split()][:2000]
+    cache_size = app.response_cache.max_entries
+
+    def clear_lru():
+        app.knowledge.matcher.fuzzy.lookup.cache_clear()
+
+    results[f"{prefix}.match_disease.cold_us"] = per_op_us(app.match_disease, words, repeat, clear_lru)
+    results[f"{prefix}.match_disease.warm_us"] = per_op_us(app.match_disease, words, repeat)
+
+    # Uncached: the full pipeline on every call.
+    app.response_cache.max_entries = 0
+    try:
+        results[f"{prefix}.get_bot_response.uncached_us"] = per_op_us(
+            lambda m: app.get_bot_response(m, app.new_state()), corpus, repeat)
+    finally:
+        app.response_cache.max_entries = cache_size
+    app.response_cache.clear()
+    results[f"{prefix}.get_bot_response.cached_us"] = per_op_us(
+        lambda m: app.get_bot_response(m, app.new_state()), corpus, repeat)
+
+    # A conversation: each message continues from the previous one's state.
+    def conversation(messages):
+        state = app.new_state()
+        for m in messages:
+            app.get_bot_response(m, state)
+
+    results[f"{prefix}.conversation_us"] = per_op_us(conversation, [corpus], repeat) / len(corpus)
+
+
+# === Runs ===
+
+def run_micro(args, results):
+    corpus = build_corpus(app.knowledge.kb, random.Random(0))
+    bench_pipeline("micro", corpus, args.repeat, results)
+
+
+def run_scaling(args, results):
+    original = app.knowledge
+    rng = random.Random(1)
+    try:
+        for n in args.sizes:
+            kb = synthetic_kb(n, original.kb, rng)
+            start = time.perf_counter()
+            app._swap_knowledge(app.build_knowledge(kb, original.generation + 1))
+            results[f"scaling.{n}.build_ms"] = (time.perf_counter() - start) * 1000
+            corpus = build_corpus(kb, rng, size=200)
+            bench_pipeline(f"scaling.{n}", corpus, args.repeat, results)
+    finally:
+        app._swap_knowledge(original)
+
+
+def run_load(args, results):
+    for rate in args.rates:
+        r = asyncio.run(load_run(app.app, rate, args.duration))
+        for name, value in r.items():
+            results[f"load.r{rate:g}.{name}"] = value
+
+
+def git_sha():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n{'metric':<48} {'before':>10} {'after':>10} {'change':>8}")
+    for name, after in sorted(results.items()):
+        before = baseline.get(name)
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = -change if name.endswith("_rps") else change
+        flag = "  <-- regression" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<48} {before:>10.2f} {after:>10.2f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=["micro", "scaling", "load"], action="append")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 10000])
+    parser.add_argument("--rates", type=float, nargs="+", default=[250, 1000], help="load arrivals per second")
+    parser.add_argument("--duration", type=float, default=3, help="seconds of load per rate")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", metavar="BASELINE")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging (0.10 = 10%%)")
+    args = parser.parse_args()
+    if args.quick:
+        args.repeat, args.sizes, args.duration = 2, [50, 1000], 1
+
+    sha = git_sha()
+    results = {}
+    for part, fn in (("micro", run_micro), ("scaling", run_scaling), ("load", run_load)):
+        if args.only and part not in args.only:
+            continue
+        start = time.perf_counter()
+        fn(args, results)
+        print(f"{part}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    for name, value in results.items():
+        print(f"{name:<48} {value:>12.2f}")
+
+    output = args.output or os.path.join(ROOT, "bench", "results", f"{sha}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": sha,
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "results": results,
+        }, f, indent=2, sort_keys=True)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            sys.exit(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
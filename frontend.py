@@ -0,0 +1,117 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone is fine
+    brotli = None
+
+
+# === Frontend ===
+# The chat page and its static/ assets are read once at startup (once in the
+# gunicorn master with preload_app) and kept in memory with gzip and brotli
+# variants already compressed. Assets are also served under a content-hashed
+# name (chat.css -> chat.3f9a1c2b7d.css) that the page links to, so browsers
+# may cache them forever; the page itself is revalidated on every load with
+# its strong ETag, which normally costs a bodyless 304.
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Preferred first.
+_ENCODINGS = ("br", "gzip")
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                if float(value) == 0:
+                    continue  # explicitly refused
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etags(header: str) -> set:
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+class Asset:
+    """One file with its compressed variants and a strong ETag for each."""
+
+    def __init__(self, body: bytes, media_type: str):
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.variants = {"identity": (body, f'"{self.digest[:20]}"')}
+        compressed = {"gzip": gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(body, quality=11)
+        for encoding, data in compressed.items():
+            if len(data) < len(body):
+                self.variants[encoding] = (data, f'"{self.digest[:20]}-{encoding}"')
+
+    def response(self, headers, cache_control: str) -> Response:
+        encoding = "identity"
+        if len(self.variants) > 1:
+            accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+            for candidate in _ENCODINGS:
+                if candidate in self.variants and (candidate in accepted or "*" in accepted):
+                    encoding = candidate
+                    break
+        body, etag = self.variants[encoding]
+        response_headers = {"ETag": etag, "Cache-Control": cache_control}
+        if len(self.variants) > 1:
+            response_headers["Vary"] = "Accept-Encoding"
+        if etag in _etags(headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=response_headers)
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(body, media_type=self.media_type, headers=response_headers)
+
+
+def _media_type(name: str) -> str:
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type.endswith(("javascript", "json")):
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+class Frontend:
+    """{url path: (Asset, Cache-Control)} for the page and everything in static_dir."""
+
+    def __init__(self, index_path: str, static_dir: str, prefix: str = "/static/"):
+        self._routes = {}
+        links = {}
+        for name in sorted(os.listdir(static_dir)):
+            path = os.path.join(static_dir, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                asset = Asset(f.read(), _media_type(name))
+            stem, ext = os.path.splitext(name)
+            hashed = f"{prefix}{stem}.{asset.digest[:10]}{ext}"
+            self._routes[hashed] = (asset, IMMUTABLE)
+            self._routes[prefix + name] = (asset, REVALIDATE)
+            links[prefix + name] = hashed
+
+        with open(index_path, encoding="utf-8") as f:
+            html = f.read()
+        for plain, hashed in links.items():
+            html = html.replace(f'"{plain}"', f'"{hashed}"')
+        self._routes["/"] = (Asset(html.encode("utf-8"), "text/html; charset=utf-8"), REVALIDATE)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._routes
+
+    def response(self, path: str, headers) -> Response:
+        asset, cache_control = self._routes[path]
+        return asset.response(headers, cache_control)
@@ -0,0 +1,30 @@
+# Gunicorn settings for HealthBot:  gunicorn -c gunicorn.conf.py app:app
+import gc
+import glob
+import os
+import tempfile
+
+bind = os.environ.get("HEALTHBOT_BIND", "0.0.0.0:" + os.environ.get("PORT", "8000"))
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master and fork the workers from it, so the KB
+# indexes (and the spaCy pipeline when HEALTHBOT_PRELOAD_NLP=1) are shared
+# copy-on-write instead of being rebuilt in every worker.
+preload_app = os.environ.get("HEALTHBOT_PRELOAD_APP", "1") == "1"
+
+# Workers write metric snapshots here so /metrics on any worker reports all.
+metrics_dir = os.environ.setdefault(
+    "HEALTHBOT_METRICS_DIR", os.path.join(tempfile.gettempdir(), "healthbot-metrics")
+)
+
+
+def on_starting(server):
+    # Drop snapshots left by a previous run; counters start again from zero.
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        os.remove(path)
+
+
+def pre_fork(server, worker):
+    # Keep the collector from touching (and so copying) preloaded objects.
+    gc.freeze()
@@ -0,0 +1,200 @@
+"""Knowledge base storage.
+
+The editable source is a JSON file ({key: {"title", "info", "prevention",
+"care", "aliases"}}). At load time it is compiled once into a compact binary
+file next to it (same name, ``.hbkb`` extension) which every worker mmaps
+read-only, so the text lives in the shared page cache instead of being copied
+into each process. Section strings are decoded on access.
+
+Compiled layout::
+
+    b"HBKB0001" | u32 header length | header JSON | UTF-8 string blob
+
+The header records the source file's mtime (to detect a stale binary) and
+maps each key to its fields; string fields are [offset, length] into the
+blob and list fields (aliases) are stored inline.
+
+Precompile during a build step with::
+
+    python knowledge_base.py knowledge_base.json
+
+If the source's directory is read-only (a typical container image), the
+binary goes to HEALTHBOT_KB_CACHE_DIR instead (default: healthbot-kb in the
+system temp directory), and failing that the KB is kept in memory.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from collections.abc import Mapping
+
+logger = logging.getLogger("uvicorn.error")
+
+MAGIC = b"HBKB0001"
+_HEADER_LEN = struct.Struct("<I")
+
+
+def compiled_path(source: str) -> str:
+    return os.path.splitext(source)[0] + ".hbkb"
+
+
+def cached_compiled_path(source: str) -> str:
+    """Where the binary goes when it can't be written next to the source."""
+    directory = os.environ.get("HEALTHBOT_KB_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "healthbot-kb")
+    stem = os.path.splitext(os.path.basename(source))[0]
+    digest = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()[:12]
+    return os.path.join(directory, f"{stem}-{digest}.hbkb")
+
+
+def _unique_keys(pairs):
+    # json keeps the last of duplicate keys silently; an entry (or field)
+    # defined twice is an editing mistake, so refuse it.
+    obj = {}
+    for key, value in pairs:
+        if key in obj:
+            raise ValueError(f"duplicate key {key!r} in knowledge base")
+        obj[key] = value
+    return obj
+
+
+def compile_knowledge_base(source: str, target: str = None) -> str:
+    """Compile a JSON knowledge base; the target is replaced atomically."""
+    target = target or compiled_path(source)
+    source_mtime_ns = os.stat(source).st_mtime_ns
+    data = _read_source(source)
+
+    blob = bytearray()
+    entries = {}
+    for key, entry in data.items():
+        fields = {}
+        for field, value in entry.items():
+            if isinstance(value, str):
+                raw = value.encode("utf-8")
+                fields[field] = [len(blob), len(raw)]
+                blob += raw
+            else:
+                fields[field] = value
+        entries[key] = fields
+    header = {"source_mtime_ns": source_mtime_ns, "entries": entries}
+    header_raw = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LEN.pack(len(header_raw)))
+            f.write(header_raw)
+            f.write(blob)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return target
+
+
+def _read_source(source: str) -> dict:
+    with open(source, encoding="utf-8") as f:
+        return json.load(f, object_pairs_hook=_unique_keys)
+
+
+class MappedEntry(Mapping):
+    __slots__ = ("_buf", "_base", "_fields")
+
+    def __init__(self, buf, base, fields):
+        self._buf = buf
+        self._base = base
+        self._fields = fields
+
+    def __getitem__(self, field):
+        value = self._fields[field]
+        if field == "aliases":
+            return value
+        offset, length = value
+        start = self._base + offset
+        return str(self._buf[start:start + length], "utf-8")
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+
+class MappedKnowledgeBase(Mapping):
+    """Read-only {key: entry} view over a compiled knowledge base file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buf[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled knowledge base")
+        (header_len,) = _HEADER_LEN.unpack_from(self._buf, len(MAGIC))
+        header_start = len(MAGIC) + _HEADER_LEN.size
+        header = json.loads(str(self._buf[header_start:header_start + header_len], "utf-8"))
+        base = header_start + header_len
+        self.source_mtime_ns = header.get("source_mtime_ns")
+        self._entries = {
+            key: MappedEntry(self._buf, base, fields)
+            for key, fields in header["entries"].items()
+        }
+
+    def __getitem__(self, key):
+        return self._entries[key]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _load_current(target: str, source: str):
+    """The compiled KB at target if it is up to date with source, else None."""
+    if not os.path.exists(target):
+        return None
+    try:
+        kb = MappedKnowledgeBase(target)
+    except (ValueError, KeyError):
+        return None  # older or foreign format, rebuild it
+    if kb.source_mtime_ns != os.stat(source).st_mtime_ns:
+        return None
+    return kb
+
+
+def load_knowledge_base(source: str) -> Mapping:
+    """Load a JSON source (recompiling it if the binary is missing or stale)
+    or an already compiled .hbkb file."""
+    if source.endswith(".hbkb"):
+        return MappedKnowledgeBase(source)
+    targets = (compiled_path(source), cached_compiled_path(source))
+    for target in targets:
+        kb = _load_current(target, source)
+        if kb is not None:
+            return kb
+    for target in targets:
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            compile_knowledge_base(source, target)
+        except OSError as exc:
+            logger.warning("Cannot write compiled knowledge base %s: %s", target, exc)
+            continue
+        return MappedKnowledgeBase(target)
+    # Nowhere writable: every worker keeps its own copy of the text.
+    logger.warning("Knowledge base %s is loaded into memory, not shared between workers", source)
+    return _read_source(source)
+
+
+if __name__ == "__main__":
+    for src in sys.argv[1:]:
+        start = time.perf_counter()
+        out = compile_knowledge_base(src)
+        print(f"{src} -> {out} ({(time.perf_counter() - start) * 1000:.1f} ms)")
@@ -0,0 +1,220 @@
+import difflib
+import re
+from collections import Counter, deque
+from functools import lru_cache
+
+
+# === Fuzzy disease index ===
+# Drop-in replacement for difflib.get_close_matches(word, keys, n=1, cutoff=...).
+#
+# get_close_matches only computes the expensive ratio() for keys whose
+# quick_ratio() (2 * shared characters / total length) clears the cutoff.
+# We index every key by its character occurrences ("e#1", "e#2", ...) and by
+# length, so counting how many postings a key shares with a word gives exactly
+# that shared-character count, and only lengths that can reach the cutoff are
+# looked at. The counting runs in C (Counter.update), and just the keys that
+# pass go through SequenceMatcher. The result is identical to the linear scan.
+
+def _occurrences(text: str):
+    seen = Counter()
+    tokens = []
+    for ch in text:
+        seen[ch] += 1
+        tokens.append((ch, seen[ch]))
+    return tokens
+
+
+class FuzzyIndex:
+    def __init__(self, keys, cutoff: float = 0.6, cache_size: int = 4096):
+        self.cutoff = cutoff
+        self.keys = list(keys)
+        self._by_length = {}
+        for i, key in enumerate(self.keys):
+            postings = self._by_length.setdefault(len(key), {})
+            for token in _occurrences(key):
+                postings.setdefault(token, []).append(i)
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _candidates(self, word: str):
+        """Yield indexes of keys whose quick_ratio() against word clears the cutoff."""
+        tokens = _occurrences(word)
+        la = len(word)
+        for lb, postings in self._by_length.items():
+            # Even a full overlap (min of both lengths) can't reach the cutoff.
+            if 2.0 * min(la, lb) / (la + lb) < self.cutoff:
+                continue
+            shared = Counter()
+            for token in tokens:
+                ids = postings.get(token)
+                if ids:
+                    shared.update(ids)
+            for i, overlap in shared.items():
+                if 2.0 * overlap / (la + lb) >= self.cutoff:
+                    yield i
+
+    def _lookup(self, word: str):
+        if not word or self.cutoff <= 0:
+            best = difflib.get_close_matches(word, self.keys, n=1, cutoff=self.cutoff)
+            return best[0] if best else None
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(word)
+        best = None
+        for i in self._candidates(word):
+            key = self.keys[i]
+            matcher.set_seq1(key)
+            score = matcher.ratio()
+            # Same tie-break as get_close_matches: highest (score, key) wins.
+            if score >= self.cutoff and (best is None or (score, key) > best):
+                best = (score, key)
+        return best[1] if best else None
+
+
+# === Phrase automaton ===
+# Aho-Corasick over word tokens rather than characters: every phrase is a
+# sequence of normalized words, so matches always fall on word boundaries and
+# a message is scanned once, left to right, whatever the number of phrases.
+
+_APOSTROPHES = str.maketrans({"’": "", "'": "", "‘": ""})
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_words(text: str):
+    return _NON_WORD.sub(" ", text.lower().translate(_APOSTROPHES)).split()
+
+
+class PhraseMatcher:
+    def __init__(self, phrases):
+        """phrases: iterable of (phrase text, value) pairs."""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase, value in phrases:
+            words = normalize_words(phrase)
+            if words:
+                self._add(words, value)
+        self._link()
+
+    def _add(self, words, value):
+        state = 0
+        for word in words:
+            nxt = self._goto[state].get(word)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][word] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if (len(words), value) not in self._out[state]:
+            self._out[state].append((len(words), value))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(word, 0)
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+    def scan(self, words):
+        """Yield (start, end, value) for every phrase occurrence, end inclusive."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for length, value in out[state]:
+                yield i - length + 1, i, value
+
+    def find_all(self, words):
+        """Leftmost-longest, non-overlapping matches as (start, end, value)."""
+        hits = sorted(self.scan(words), key=lambda h: (h[0], -h[1]))
+        result = []
+        covered = -1
+        for start, end, value in hits:
+            if start > covered:
+                result.append((start, end, value))
+                covered = end
+        return result
+
+
+# === Disease detection ===
+
+def disease_phrases(knowledge_base, aliases: bool = True):
+    """(phrase, key) pairs from each entry's key, title and aliases."""
+    for key, entry in knowledge_base.items():
+        yield key.replace("_", " "), key
+        title = entry.get("title", "")
+        yield title, key
+        # "Influenza (Flu)" -> "Influenza" and "Flu"
+        for part in re.split(r"[()]", title):
+            yield part, key
+        if aliases:
+            for alias in entry.get("aliases", ()):
+                yield alias, key
+
+
+class DiseaseMatcher:
+    """Exact phrase/alias mentions first, fuzzy per-word matching as fallback.
+
+    A one-word alias is only as good as its position: an ordinary word can be
+    meant otherwise, so a fuzzy match on a word before it wins.
+    """
+
+    def __init__(self, knowledge_base, cutoff: float = 0.6):
+        self.phrases = PhraseMatcher(disease_phrases(knowledge_base))
+        self.fuzzy = FuzzyIndex(knowledge_base.keys(), cutoff=cutoff)
+        names = {(tuple(normalize_words(p)), key) for p, key in disease_phrases(knowledge_base, aliases=False)}
+        self._one_word_aliases = set()  # (word, key)
+        for key, entry in knowledge_base.items():
+            for alias in entry.get("aliases", ()):
+                words = tuple(normalize_words(alias))
+                if len(words) == 1 and (words, key) not in names:
+                    self._one_word_aliases.add((words[0], key))
+
+    def find_all(self, text: str):
+        """Every disease mentioned in text, in order of appearance."""
+        return [key for _, _, key in self.phrases.find_all(normalize_words(text))]
+
+    def first(self, text: str, words=None, skip=None):
+        """First disease in text. Words for which skip(normalized word) is true
+        are not tried against the fuzzy index."""
+        return self.detect(text, words, skip)[0]
+
+    def detect(self, text: str, words=None, skip=None):
+        """Like first(), as (key, "exact" | "fuzzy") or (None, None)."""
+        return self.match(text, words, skip)[:2]
+
+    def match(self, text: str, words=None, skip=None):
+        """Like detect(), plus the word a fuzzy match was made on:
+        (key, how, word) with word None for exact matches."""
+        normalized = normalize_words(text)
+        exact = None
+        for start, end, key in self.phrases.find_all(normalized):
+            if start != end or (normalized[start], key) not in self._one_word_aliases:
+                return key, "exact", None
+            exact = start, key
+            break
+        position = 0  # in normalized words
+        for word in words if words is not None else text.split():
+            if exact is not None and position >= exact[0]:
+                break
+            word_normalized = normalize_words(word)
+            position += len(word_normalized)
+            if skip is not None and any(skip(w) for w in word_normalized):
+                continue
+            key = self.fuzzy.lookup(word.lower())
+            if key:
+                return key, "fuzzy", word
+        if exact is not None:
+            return exact[1], "exact", None
+        return None, None, None
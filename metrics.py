@@ -0,0 +1,202 @@
+import bisect
+import glob
+import json
+import math
+import os
+import threading
+
+
+# === Metrics ===
+# Minimal Prometheus-style counters, gauges and histograms for the hot path.
+# Recording is a dict update under a lock (well under a microsecond), so it
+# stays on in production.
+#
+# Each gunicorn worker has its own registry. When a metrics directory is set,
+# every worker periodically writes a snapshot there (<pid>.json) and /metrics
+# merges all of them: counters and histograms are summed across live and exited
+# workers (so totals never go backwards when a worker is replaced), gauges only
+# across live ones. A gauge declared with merge="max" is a value every worker
+# holds its own copy of (the KB size), so the largest is reported, not the sum.
+
+# Seconds; the hot path is measured in microseconds.
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+def _labels_key(labels: dict):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    def __init__(self, directory: str = None, buckets=DEFAULT_BUCKETS):
+        self.directory = directory
+        self.buckets = tuple(buckets)
+        self._meta = {}        # name -> (type, help)
+        self._gauge_merge = {}  # name -> "sum" | "max"
+        self._counters = {}    # (name, labels) -> value
+        self._gauges = {}
+        self._histograms = {}  # (name, labels) -> [per-bucket counts..., +Inf count, sum]
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    # --- declaration ---
+
+    def counter(self, name: str, help: str):
+        self._meta[name] = ("counter", help)
+
+    def gauge(self, name: str, help: str, merge: str = "sum"):
+        if merge not in ("sum", "max"):
+            raise ValueError(f"Unknown gauge merge: {merge!r}")
+        self._meta[name] = ("gauge", help)
+        self._gauge_merge[name] = merge
+
+    def histogram(self, name: str, help: str):
+        self._meta[name] = ("histogram", help)
+
+    def add_collector(self, fn):
+        """fn() is called before each snapshot to refresh values kept elsewhere."""
+        self._collectors.append(fn)
+
+    # --- recording ---
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_counter(self, name: str, value: float, **labels):
+        """For monotonic totals counted elsewhere (e.g. cache hits)."""
+        with self._lock:
+            self._counters[(name, _labels_key(labels))] = value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, _labels_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels_key(labels))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            hist[i] += 1
+            hist[-1] += value
+
+    # --- export ---
+
+    def snapshot(self) -> dict:
+        for fn in self._collectors:
+            fn()
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "meta": dict(self._meta),
+                "counters": [[n, list(map(list, l)), v] for (n, l), v in self._counters.items()],
+                "gauges": [[n, list(map(list, l)), v] for (n, l), v in self._gauges.items()],
+                "histograms": [[n, list(map(list, l)), list(h)] for (n, l), h in self._histograms.items()],
+                "buckets": list(self.buckets),
+            }
+
+    def flush(self):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # being replaced right now
+        return snapshots
+
+    def render(self) -> str:
+        """Prometheus text format, merged across workers."""
+        meta, counters, gauges, histograms = {}, {}, {}, {}
+        buckets = self.buckets
+        for snap in self._snapshots():
+            alive = _alive(snap["pid"])
+            meta.update({n: tuple(m) for n, m in snap["meta"].items()})
+            for name, labels, value in snap["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            if alive:
+                for name, labels, value in snap["gauges"]:
+                    key = (name, tuple(map(tuple, labels)))
+                    if key not in gauges:
+                        gauges[key] = value
+                    elif self._gauge_merge.get(name) == "max":
+                        gauges[key] = max(gauges[key], value)
+                    else:
+                        gauges[key] += value
+            if tuple(snap["buckets"]) != buckets:
+                continue
+            for name, labels, hist in snap["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(hist))
+                for i, v in enumerate(hist):
+                    merged[i] += v
+
+        lines = []
+        for name in sorted({n for n, _ in list(counters) + list(gauges) + list(histograms)}):
+            kind, help = meta.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for (n, labels), value in sorted(gauges.items()):
+                if n == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for (n, labels), hist in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (math.inf,), hist[:-1]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(hist[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
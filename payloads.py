@@ -0,0 +1,43 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib codec gives identical output, slower
+    orjson = None
+
+
+# === JSON codec ===
+# dumps() returns compact UTF-8 bytes, ready to send.
+
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
+
+
+# === Pre-encoded /chat payloads ===
+# The app's own replies (greeting, prompts, fallbacks) are a small fixed set,
+# so their JSON is built once per KB load. A response is then the cached
+# prefix plus the session id: {"reply":"...","session_id":"..."}. KB sections
+# are not kept here: a copy per worker would undo the shared mmap, and they
+# encode in about a microsecond anyway.
+
+_REPLY_PREFIX = b'{"reply":'
+
+
+class ReplyPayloads:
+    def __init__(self, replies=()):
+        self._prefixes = {reply: _REPLY_PREFIX + dumps(reply) for reply in replies}
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    def encode(self, reply: str, session_id: str) -> bytes:
+        prefix = self._prefixes.get(reply)
+        if prefix is None:  # KB sections, search and similarity replies
+            prefix = _REPLY_PREFIX + dumps(reply)
+        return prefix + b',"session_id":' + dumps(session_id) + b"}"
@@ -0,0 +1,189 @@
+import heapq
+import math
+import re
+
+from matching import normalize_words
+
+
+# === Full-text retrieval (BM25) ===
+# Ranked search over the info / prevention / care text of every entry, used
+# when a message names no disease ("which diseases spread through
+# mosquitoes"). One document per (key, section); a disease scores as its best
+# section.
+
+SECTIONS = ("info", "prevention", "care")
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could do does
+for from had has have how i if in into is it its me my no not of on or our so
+such than that the their them then there these they this through to too was
+we were what when where which while who why will with would you your
+disease diseases get like
+""".split())
+
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+
+def stem(word: str) -> str:
+    """Tiny suffix stripper: enough for mosquitoes/mosquito, infections/infection."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str):
+    return [stem(w) for w in normalize_words(text) if w not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with BM25 scoring; documents can be added and removed."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> {doc_id: term frequency}
+        self._lengths = {}   # doc_id -> number of terms
+        self._total_length = 0
+        # term -> [(doc_id, BM25 weight)], filled on first query and dropped
+        # on any change, so repeated queries are just additions.
+        self._impacts = {}
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._lengths
+
+    def has_term(self, term) -> bool:
+        return term in self._postings
+
+    def copy(self) -> "BM25Index":
+        clone = BM25Index(self.k1, self.b)
+        clone._postings = {term: dict(docs) for term, docs in self._postings.items()}
+        clone._lengths = dict(self._lengths)
+        clone._total_length = self._total_length
+        clone._impacts = {}
+        return clone
+
+    def add(self, doc_id, terms):
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._lengths[doc_id] = len(terms)
+        self._total_length += len(terms)
+        self._impacts = {}
+
+    def remove(self, doc_id, terms=None):
+        """Drop a document. Pass its terms to avoid scanning every posting list."""
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        self._impacts = {}
+        for term in set(terms) if terms is not None else list(self._postings):
+            docs = self._postings.get(term)
+            if docs and docs.pop(doc_id, None) is not None and not docs:
+                del self._postings[term]
+
+    def search(self, terms, k: int = 10):
+        """Top-k (score, doc_id) pairs, best first."""
+        scores = {}
+        for term in set(terms):
+            impacts = self._impacts.get(term)
+            if impacts is None:
+                impacts = self._impacts[term] = self._term_impacts(term)
+            for doc_id, weight in impacts:
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        return heapq.nlargest(k, ((score, doc_id) for doc_id, score in scores.items()))
+
+    def _term_impacts(self, term):
+        docs = self._postings.get(term)
+        if not docs:
+            return []
+        n = len(self._lengths)
+        avgdl = self._total_length / n
+        k1, b = self.k1, self.b
+        df = len(docs)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        return [
+            (doc_id, idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * self._lengths[doc_id] / avgdl)))
+            for doc_id, tf in docs.items()
+        ]
+
+
+class DiseaseRetriever:
+    """BM25 over knowledge base sections, returning diseases with snippets."""
+
+    def __init__(self):
+        self.index = BM25Index()
+        self._kb = {}
+        # (key, section) -> hash of the indexed text. The text itself is read
+        # from the (mmapped) knowledge base, not copied.
+        self._digests = {}
+
+    @classmethod
+    def build(cls, knowledge_base, previous: "DiseaseRetriever" = None) -> "DiseaseRetriever":
+        """Index a knowledge base. With `previous`, start from a copy of it and
+        only re-tokenize sections whose text changed."""
+        retriever = cls()
+        retriever._kb = knowledge_base
+        if previous is not None:
+            retriever.index = previous.index.copy()
+            retriever._digests = dict(previous._digests)
+        wanted = set()
+        for key, entry in knowledge_base.items():
+            for section in SECTIONS:
+                text = entry.get(section)
+                if not text:
+                    continue
+                doc_id = (key, section)
+                wanted.add(doc_id)
+                digest = hash(text)
+                if retriever._digests.get(doc_id) != digest:
+                    if doc_id in retriever._digests:
+                        retriever.index.remove(doc_id, tokenize(previous._text(doc_id)))
+                    retriever.index.add(doc_id, tokenize(text))
+                    retriever._digests[doc_id] = digest
+        for doc_id in set(retriever._digests) - wanted:
+            del retriever._digests[doc_id]
+            retriever.index.remove(doc_id, tokenize(previous._text(doc_id)))
+        return retriever
+
+    def knows(self, word: str) -> bool:
+        """True if word (already normalized) occurs in the indexed KB text."""
+        return self.index.has_term(stem(word))
+
+    def _text(self, doc_id) -> str:
+        key, section = doc_id
+        return self._kb[key][section]
+
+    def search(self, query: str, k: int = 3):
+        """Up to k (key, section, snippet, score) results, one per disease."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        results = []
+        seen = set()
+        # Sections come back best first; keep each disease's best one.
+        for score, (key, section) in self.index.search(terms, k * len(SECTIONS)):
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append((key, section, self._snippet(self._text((key, section)), terms), score))
+            if len(results) == k:
+                break
+        return results
+
+    @staticmethod
+    def _snippet(text: str, terms) -> str:
+        wanted = set(terms)
+        sentences = _SENTENCES.split(text)
+        return max(sentences, key=lambda s: len(wanted.intersection(tokenize(s))))
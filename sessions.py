@@ -0,0 +1,147 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# === Conversation state stores ===
+# Each session id maps to a small state dict ({"current_disease": ...}).
+# Both backends expire sessions after `ttl` seconds of inactivity and keep at
+# most `max_sessions`, evicting the least recently used first.
+
+def new_state():
+    return {"current_disease": None}
+
+
+class MemorySessionStore:
+    """Per-process store. Fine for a single worker or sticky sessions."""
+
+    def __init__(self, ttl: float = 1800, max_sessions: int = 10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, session_id: str) -> bool:
+        item = self._data.get(session_id)
+        return item is not None and time.monotonic() - item[0] <= self.ttl
+
+    def get(self, session_id: str) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(session_id)
+            if item is None or now - item[0] > self.ttl:
+                self._data.pop(session_id, None)
+                return new_state()
+            self._data.move_to_end(session_id)
+            return dict(item[1])
+
+    def set(self, session_id: str, state: dict):
+        now = time.monotonic()
+        with self._lock:
+            self._data[session_id] = (now, dict(state))
+            self._data.move_to_end(session_id)
+            self._evict(now)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def _evict(self, now):
+        while self._data:
+            session_id, (touched, _) = next(iter(self._data.items()))
+            if len(self._data) <= self.max_sessions and now - touched <= self.ttl:
+                break
+            del self._data[session_id]
+
+
+class SQLiteSessionStore:
+    """Store shared by every worker on the host through one SQLite file."""
+
+    # Expired/overflow rows are swept every this many writes, not on each one.
+    SWEEP_EVERY = 256
+
+    def __init__(self, path: str, ttl: float = 1800, max_sessions: int = 100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def _db(self):
+        # Connected lazily and per process: a connection must not cross a
+        # fork (gunicorn preload_app imports the app in the master).
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY, state TEXT NOT NULL, touched REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_touched ON sessions (touched)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM sessions WHERE id = ? AND touched >= ?",
+                (session_id, time.time() - self.ttl),
+            ).fetchone() is not None
+
+    def get(self, session_id: str) -> dict:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state FROM sessions WHERE id = ? AND touched >= ?",
+                (session_id, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else new_state()
+
+    def set(self, session_id: str, state: dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, touched) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state), time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._sweep()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def _sweep(self):
+        self._db.execute("DELETE FROM sessions WHERE touched < ?", (time.time() - self.ttl,))
+        self._db.execute(
+            "DELETE FROM sessions WHERE id IN ("
+            " SELECT id FROM sessions ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+
+def create_session_store():
+    """Pick the backend from HEALTHBOT_SESSION_* environment variables."""
+    backend = os.environ.get("HEALTHBOT_SESSION_BACKEND", "memory")
+    ttl = float(os.environ.get("HEALTHBOT_SESSION_TTL", "1800"))
+    if backend == "sqlite":
+        path = os.environ.get("HEALTHBOT_SESSION_DB", "healthbot_sessions.db")
+        max_sessions = int(os.environ.get("HEALTHBOT_SESSION_MAX", "100000"))
+        return SQLiteSessionStore(path, ttl=ttl, max_sessions=max_sessions)
+    if backend == "memory":
+        max_sessions = int(os.environ.get("HEALTHBOT_SESSION_MAX", "10000"))
+        return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+    raise ValueError(f"Unknown HEALTHBOT_SESSION_BACKEND: {backend!r}")
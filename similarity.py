@@ -0,0 +1,146 @@
+import zlib
+
+import numpy as np
+
+from retrieval import SECTIONS, tokenize
+
+
+# === Symptom similarity (hashed TF-IDF) ===
+# Every KB section becomes an L2-normalized TF-IDF vector over hashed unigram
+# and bigram features, stacked into one sparse matrix kept in column (feature)
+# order. Scoring a batch of queries is a single sparse x sparse product done
+# with NumPy gathers and a bincount: for each query feature we pull that
+# feature's column and accumulate query weight * section weight. No model
+# downloads, no network, CPU only.
+
+N_FEATURES = 1 << 18
+# Upper bound on the dense (queries x sections) score block per step.
+MAX_BLOCK = 1 << 22
+
+
+def _hash(term: str, n_features: int) -> int:
+    # crc32 rather than hash(): stable across processes and restarts.
+    return zlib.crc32(term.encode("utf-8")) & (n_features - 1)
+
+
+def hashed_features(text: str, n_features: int = N_FEATURES):
+    terms = tokenize(text)
+    grams = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+    counts = {}
+    for gram in grams:
+        feature = _hash(gram, n_features)
+        counts[feature] = counts.get(feature, 0) + 1
+    return counts
+
+
+class SimilarityEngine:
+    def __init__(self, knowledge_base, n_features: int = N_FEATURES):
+        self.n_features = n_features
+        self.keys = []       # disease key per group of rows
+        self.doc_ids = []    # (key, section) per row
+        group_starts = []
+        rows, cols, tfs = [], [], []
+        for key, entry in knowledge_base.items():
+            group_starts.append(len(self.doc_ids))
+            self.keys.append(key)
+            for section in SECTIONS:
+                text = entry.get(section)
+                if not text:
+                    continue
+                row = len(self.doc_ids)
+                self.doc_ids.append((key, section))
+                for feature, count in hashed_features(text, n_features).items():
+                    rows.append(row)
+                    cols.append(feature)
+                    tfs.append(count)
+        n_docs = len(self.doc_ids)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        tf = 1.0 + np.log(np.asarray(tfs, dtype=np.float64))
+
+        df = np.bincount(cols, minlength=n_features)
+        self.idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+        data = tf * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=n_docs))
+        data /= np.where(norms > 0, norms, 1.0)[rows]
+
+        # Column-compressed layout: a feature's sections are contiguous.
+        order = np.argsort(cols, kind="stable")
+        self._rows = rows[order].astype(np.int32)
+        self._data = data[order].astype(np.float32)
+        self._col_ptr = np.zeros(n_features + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n_features), out=self._col_ptr[1:])
+        # Rows of one disease are contiguous; reduceat over these gives its best section.
+        self._group_starts = np.asarray(group_starts, dtype=np.int64)
+        self._has_rows = np.diff(np.append(self._group_starts, n_docs)) > 0
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def _vectorize(self, queries):
+        qrows, feats, weights = [], [], []
+        for i, query in enumerate(queries):
+            counts = hashed_features(query, self.n_features)
+            if not counts:
+                continue
+            f = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            w = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))) * self.idf[f]
+            w /= np.sqrt(np.dot(w, w))
+            qrows.append(np.full(len(f), i, dtype=np.int64))
+            feats.append(f)
+            weights.append(w)
+        if not qrows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+        return np.concatenate(qrows), np.concatenate(feats), np.concatenate(weights)
+
+    def scores(self, queries) -> np.ndarray:
+        """Cosine similarity of every query against every section, (queries x sections)."""
+        n_docs = len(self.doc_ids)
+        out = np.zeros((len(queries), n_docs), dtype=np.float32)
+        qrows, feats, weights = self._vectorize(queries)
+        if not n_docs or not len(qrows):
+            return out
+        block = max(1, MAX_BLOCK // n_docs)
+        for start in range(0, len(queries), block):
+            stop = min(start + block, len(queries))
+            lo, hi = np.searchsorted(qrows, [start, stop])
+            out[start:stop] = self._product(qrows[lo:hi] - start, feats[lo:hi], weights[lo:hi], stop - start)
+        return out
+
+    def _product(self, qrows, feats, weights, n_queries):
+        begin = self._col_ptr[feats]
+        lengths = self._col_ptr[feats + 1] - begin
+        total = int(lengths.sum())
+        if not total:
+            return 0.0
+        # Positions of every (query feature, section) pair in the column arrays.
+        offsets = np.repeat(begin - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        rows = self._rows[offsets]
+        vals = self._data[offsets] * np.repeat(weights, lengths)
+        n_docs = len(self.doc_ids)
+        flat = np.repeat(qrows, lengths) * n_docs + rows
+        return np.bincount(flat, weights=vals, minlength=n_queries * n_docs).reshape(n_queries, n_docs)
+
+    def top(self, queries, k: int = 3, threshold: float = 0.0):
+        """For each query, up to k (key, score) pairs (best section per disease)
+        scoring at least threshold, best first."""
+        results = []
+        if not self.keys:
+            return [[] for _ in queries]
+        n_docs = len(self.doc_ids)
+        block = max(1, MAX_BLOCK // max(n_docs, 1))
+        for start in range(0, len(queries), block):
+            section_scores = self.scores(queries[start:start + block])
+            if not n_docs:
+                results.extend([] for _ in section_scores)
+                continue
+            starts = np.minimum(self._group_starts, n_docs - 1)
+            best = np.maximum.reduceat(section_scores, starts, axis=1)
+            best[:, ~self._has_rows] = 0.0
+            kk = min(k, best.shape[1])
+            candidates = np.argpartition(-best, kk - 1, axis=1)[:, :kk]
+            for row, cand in zip(best, candidates):
+                cand = cand[np.argsort(-row[cand], kind="stable")]
+                results.append([(self.keys[j], float(row[j])) for j in cand if row[j] >= threshold and row[j] > 0])
+        return results
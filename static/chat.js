@@ -0,0 +1,236 @@
+function toggleTheme() {
+  document.body.classList.toggle("dark");
+  const toggleBtn = document.querySelector(".theme-toggle");
+  toggleBtn.textContent = document.body.classList.contains("dark")
+    ? "☀️"
+    : "🌙";
+}
+
+function addMessage(message, sender, options = null) {
+  const chatBox = document.getElementById("chatBox");
+  const msgWrapper = document.createElement("div");
+  msgWrapper.className = "message " + sender;
+
+  const avatar = document.createElement("img");
+  avatar.src =
+    sender === "bot"
+      ? "https://cdn-icons-png.flaticon.com/128/11066/11066885.png"
+      : "https://cdn-icons-png.flaticon.com/128/15181/15181334.png";
+
+  const bubble = document.createElement("div");
+  bubble.className = "msg-bubble";
+  bubble.textContent =
+    sender === "user" ? message : "HealthBot: " + message;
+
+  msgWrapper.appendChild(sender === "bot" ? avatar : bubble);
+  msgWrapper.appendChild(sender === "bot" ? bubble : avatar);
+
+  chatBox.appendChild(msgWrapper);
+
+  if (options) {
+    addOptions(options);
+  }
+
+  chatBox.scrollTop = chatBox.scrollHeight;
+  return msgWrapper; // return in case we want to delete later
+}
+
+function addOptions(options) {
+  const chatBox = document.getElementById("chatBox");
+  const btnContainer = document.createElement("div");
+  btnContainer.className = "options";
+  options.forEach((opt) => {
+    const btn = document.createElement("button");
+    btn.textContent = opt;
+    btn.onclick = () => {
+      document.getElementById("userInput").value = opt;
+      sendMessage();
+    };
+    btnContainer.appendChild(btn);
+  });
+  chatBox.appendChild(btnContainer);
+  chatBox.scrollTop = chatBox.scrollHeight;
+}
+
+function showTyping() {
+  const chatBox = document.getElementById("chatBox");
+  const typingWrapper = document.createElement("div");
+  typingWrapper.className = "message bot typing-indicator";
+
+  const avatar = document.createElement("img");
+  avatar.src =
+    "https://cdn-icons-png.flaticon.com/128/11066/11066885.png";
+
+  const bubble = document.createElement("div");
+  bubble.className = "msg-bubble typing";
+  bubble.innerHTML = "<span></span><span></span><span></span>";
+
+  typingWrapper.appendChild(avatar);
+  typingWrapper.appendChild(bubble);
+  chatBox.appendChild(typingWrapper);
+  chatBox.scrollTop = chatBox.scrollHeight;
+  return typingWrapper;
+}
+
+function removeTyping(typingElement) {
+  if (typingElement && typingElement.parentNode) {
+    typingElement.parentNode.removeChild(typingElement);
+  }
+}
+
+// Same origin as the page (the app serves it), so no CORS preflights.
+const API_BASE = "";
+
+// Server-side conversation state is keyed by this id.
+let sessionId = sessionStorage.getItem("healthbotSession");
+
+// One WebSocket for the whole conversation; replies arrive in order.
+let socket = null;
+const pendingReplies = [];
+
+function openSocket() {
+  if (socket && socket.readyState === WebSocket.OPEN) {
+    return Promise.resolve(socket);
+  }
+  return new Promise((resolve, reject) => {
+    let url = (API_BASE || location.origin).replace(/^http/, "ws") + "/ws";
+    if (sessionId) url += "?session_id=" + encodeURIComponent(sessionId);
+    const ws = new WebSocket(url);
+    ws.onopen = () => {
+      socket = ws;
+      resolve(ws);
+    };
+    ws.onerror = () => reject(new Error("WebSocket unavailable"));
+    ws.onclose = () => {
+      if (socket === ws) socket = null;
+      while (pendingReplies.length) {
+        pendingReplies.shift().reject(new Error("WebSocket closed"));
+      }
+    };
+    ws.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === "ping") {
+        ws.send(JSON.stringify({ type: "pong" }));
+      } else if (data.type === "session") {
+        sessionId = data.session_id;
+        sessionStorage.setItem("healthbotSession", sessionId);
+      } else if (data.type === "reply") {
+        const pending = pendingReplies.shift();
+        if (pending) pending.resolve(data.reply);
+      } else if (data.type === "error") {
+        const pending = pendingReplies.shift();
+        if (pending) pending.reject(new Error(data.error));
+      }
+    };
+  });
+}
+
+async function socketReply(message) {
+  const ws = await openSocket();
+  return new Promise((resolve, reject) => {
+    pendingReplies.push({ resolve, reject });
+    ws.send(JSON.stringify({ type: "message", message: message }));
+  });
+}
+
+// Reads the /chat/stream Server-Sent Events and shows each sentence as
+// soon as it arrives. Resolves with the full reply.
+async function streamReply(message, typingIndicator) {
+  const response = await fetch(API_BASE + "/chat/stream", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ message: message, session_id: sessionId }),
+  });
+  if (!response.ok) throw new Error("HTTP " + response.status);
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let bubble = null;
+  let text = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let event = "message";
+      let data = "";
+      frame.split("\n").forEach((line) => {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      });
+      const payload = JSON.parse(data);
+
+      if (event === "session") {
+        sessionId = payload.session_id;
+        sessionStorage.setItem("healthbotSession", sessionId);
+      } else if (event === "done") {
+        removeTyping(typingIndicator);
+        if (bubble) {
+          bubble.textContent = "HealthBot: " + payload.reply;
+        } else {
+          addMessage(payload.reply, "bot");
+        }
+        return payload.reply;
+      } else {
+        text = text ? text + " " + payload.sentence : payload.sentence;
+        if (!bubble) {
+          removeTyping(typingIndicator);
+          bubble = addMessage(text, "bot").querySelector(".msg-bubble");
+        } else {
+          bubble.textContent = "HealthBot: " + text;
+        }
+      }
+    }
+  }
+  throw new Error("Stream ended early");
+}
+
+function sendMessage() {
+  const input = document.getElementById("userInput");
+  const message = input.value.trim();
+  if (message === "") return;
+
+  addMessage(message, "user");
+  input.value = "";
+
+  const goodbyes = ["bye", "goodbye", "see you", "take care", "later"];
+  if (goodbyes.some((bye) => message.toLowerCase().includes(bye))) {
+    addMessage(
+      "Goodbye! 👋 Stay healthy and take care. Come back anytime if you have more questions!",
+      "bot"
+    );
+    return;
+  }
+
+  // Show typing animation
+  const typingIndicator = showTyping();
+
+  // WebSocket first; plain HTTP streaming if it can't be used.
+  const reply = window.WebSocket
+    ? socketReply(message).then((reply) => {
+        removeTyping(typingIndicator);
+        addMessage(reply, "bot");
+        return reply;
+      })
+    : Promise.reject(new Error("No WebSocket support"));
+
+  reply
+    .catch(() => streamReply(message, typingIndicator))
+    .then((reply) => {
+      if (reply.includes("Do you want to know")) {
+        addOptions(["Symptoms", "Care", "Prevention"]);
+      }
+    })
+    .catch((error) => {
+      removeTyping(typingIndicator);
+      addMessage("Sorry, there was an error.", "bot");
+      console.error(error);
+    });
+}